@@ -0,0 +1,64 @@
+"""Memory held by scan results: peak and retained bytes for a scan of a generated project.
+
+    python benchmarks/bench_memory.py [--sprites 5000] [--frames 8] [--output memory.json]
+
+Generates a project with make_project.py, then measures with tracemalloc while scan_project_all
+runs (layer PNGs listed, duplicate index built) and after, with the results still referenced.
+Project options are the same as make_project.py.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from make_project import make_project, VARIANTS
+from gms2_cleaner_scan_module import scan_project_all, fill_layer_pngs
+from gms2_cleaner_duplicate_module import build_duplicate_index
+
+def measure(project_dir):
+    tracemalloc.start()
+    sprite_data, file_sizes, used_frames, layer_data = scan_project_all(project_dir, max_workers=1)
+    fill_layer_pngs(layer_data)
+    duplicate_index = build_duplicate_index(file_sizes, max_workers=1)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    frames = sum(len(group) for group in file_sizes.values())
+    del sprite_data, used_frames, layer_data, duplicate_index
+    return {"retained": retained, "peak": peak, "root_pngs": frames}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sprites", type=int, default=5000)
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--ghost-ratio", type=float, default=0.25)
+    parser.add_argument("--layer-depth", type=int, default=1)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--variant", choices=sorted(VARIANTS), default="2.3")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="gms2_bench_")
+    try:
+        project_dir = os.path.join(work_dir, "project")
+        make_project(project_dir, args.sprites, args.frames, args.ghost_ratio, args.layer_depth,
+                     args.duplicate_ratio, args.variant, args.seed)
+        result = measure(project_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    per_png = result["retained"] / max(result["root_pngs"], 1)
+    print(f"root PNGs {result['root_pngs']}: retained {result['retained'] / 2 ** 20:.1f} MB "
+          f"({per_png:.0f} B per PNG), peak {result['peak'] / 2 ** 20:.1f} MB")
+    if args.output:
+        result["params"] = vars(args)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=1)
+
+if __name__ == "__main__":
+    main()
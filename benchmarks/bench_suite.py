@@ -0,0 +1,196 @@
+"""Benchmark scan, delete and display on a synthetic project; results go to JSON for comparing runs.
+
+    python benchmarks/bench_suite.py [--sprites 500] [--frames 4] [--repeat 3] [--output results.json]
+    python benchmarks/bench_suite.py --compare old.json new.json
+
+Times scan_gms2_project, scan_layers, delete_files with and without a backup, undo_last_delete,
+and FolderList.populate / load_folder_contents. Every delete runs on a fresh copy of the project;
+copying is not timed. The display benchmarks need Tk: without $DISPLAY an Xvfb server is started
+if one is installed, otherwise they are skipped. Project options are the same as make_project.py.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from make_project import make_project, VARIANTS
+from gms2_cleaner_scan_module import scan_gms2_project, scan_layers
+from gms2_cleaner_deletion_module import delete_files, undo_last_delete, trash_root_for
+
+def timed(fn, repeat, setup=None):
+    """Run fn repeat times (after setup(), untimed, if given) and return its timings."""
+    runs = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        runs.append(time.perf_counter() - start)
+    return {"best": min(runs), "median": statistics.median(runs), "runs": runs}
+
+def unused_paths(project_dir):
+    sprite_data = scan_gms2_project(project_dir)[0]
+    return [path for f in sprite_data for _, path, _ in sprite_data[f]["sprites"]]
+
+def bench_scan(project_dir, repeat):
+    return {"scan_gms2_project": timed(lambda: scan_gms2_project(project_dir), repeat),
+            "scan_layers": timed(lambda: scan_layers(project_dir), repeat)}
+
+def bench_delete(project_dir, work_dir, repeat):
+    results = {}
+    copy_dir = os.path.join(work_dir, "copy")
+    backup_dir = os.path.join(work_dir, "backups")
+
+    def fresh_copy():
+        for path in (copy_dir, trash_root_for(copy_dir), backup_dir):
+            shutil.rmtree(path, ignore_errors=True)
+        shutil.copytree(project_dir, copy_dir)
+        return (unused_paths(copy_dir),)
+
+    for label, backup in (("delete_files", False), ("delete_files_backup", True)):
+        results[label] = timed(lambda paths: delete_files(paths, trash_root_for(copy_dir), "bench", backup, backup_dir),
+                               repeat, fresh_copy)
+
+    def deleted_copy():
+        paths = fresh_copy()[0]
+        delete_files(paths, trash_root_for(copy_dir), "bench", False)
+        return ()
+
+    results["undo_last_delete"] = timed(lambda: undo_last_delete(trash_root_for(copy_dir)), repeat, deleted_copy)
+    for path in (copy_dir, trash_root_for(copy_dir), backup_dir):
+        shutil.rmtree(path, ignore_errors=True)
+    return results
+
+def start_display():
+    """Make sure Tk has a display. Returns (Xvfb process or None, reason if there is no display)."""
+    if os.environ.get("DISPLAY"):
+        return None, None
+    if shutil.which("Xvfb") is None:
+        return None, "no $DISPLAY and Xvfb is not installed"
+    display = f":{os.getpid() % 500 + 100}"
+    server = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    os.environ["DISPLAY"] = display
+    return server, None
+
+def bench_display(project_dir, repeat):
+    server, reason = start_display()
+    if reason:
+        return {"skipped": reason}
+    try:
+        import tkinter as tk
+        from gms2_cleaner_display_module import FolderList, load_folder_contents
+        from gms2_cleaner_checklist_module import VirtualCheckList
+        from gms2_cleaner_scan_module import scan_project_all, fill_layer_pngs
+        from gms2_cleaner_duplicate_module import build_duplicate_index
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            return {"skipped": f"Tk could not start: {e}"}
+        root.withdraw()
+        sprite_data, file_sizes, _, layer_data = scan_project_all(project_dir)
+        fill_layer_pngs(layer_data)
+        duplicate_index = build_duplicate_index(file_sizes)
+        folder_list = FolderList(tk.Listbox(root))
+        checklist = VirtualCheckList(tk.Canvas(root), tk.Scrollbar(root))
+        image_label = tk.Label(root)
+        folders = sorted(sprite_data)
+
+        def load_all(mode):
+            for folder in folders:
+                load_folder_contents(folder, checklist, sprite_data, layer_data, duplicate_index, image_label, mode=mode)
+            root.update_idletasks()
+
+        results = {
+            "populate_folder_list": timed(lambda: (folder_list.populate(sprite_data, layer_data, mode="sprites"),
+                                                   root.update_idletasks()), repeat),
+            "load_folder_contents_sprites": timed(lambda: load_all("sprites"), repeat),
+            "load_folder_contents_layers": timed(lambda: load_all("layers"), repeat),
+        }
+        root.destroy()
+        return results
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+def compare(old_path, new_path, threshold):
+    """Print new/old for each benchmark (best times); returns 1 if any got slower than threshold."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    if old["params"] != new["params"]:
+        print(f"Note: the runs used different options ({old['params']} vs {new['params']})")
+    old, new = old["results"], new["results"]
+    status = 0
+    for name in new:
+        if "best" not in new[name] or "best" not in old.get(name, {}):
+            continue
+        ratio = new[name]["best"] / old[name]["best"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag, status = "  SLOWER", 1
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{name:<32}{old[name]['best'] * 1e3:>10.1f} ms{new[name]['best'] * 1e3:>10.1f} ms{ratio:>8.2f}x{flag}")
+    return status
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sprites", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=4)
+    parser.add_argument("--ghost-ratio", type=float, default=0.25)
+    parser.add_argument("--layer-depth", type=int, default=1)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--variant", choices=sorted(VARIANTS), default="2.3")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-display", action="store_true", help="don't run the Tk benchmarks")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    parser.add_argument("--threshold", type=float, default=0.1, help="--compare flags changes beyond this (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+
+    params = {k: getattr(args, k) for k in ("sprites", "frames", "ghost_ratio", "layer_depth",
+                                            "duplicate_ratio", "variant", "seed", "repeat")}
+    work_dir = tempfile.mkdtemp(prefix="gms2_bench_")
+    try:
+        project_dir = os.path.join(work_dir, "project")
+        project = make_project(project_dir, args.sprites, args.frames, args.ghost_ratio, args.layer_depth,
+                               args.duplicate_ratio, args.variant, args.seed)
+        results = bench_scan(project_dir, args.repeat)
+        results.update(bench_delete(project_dir, work_dir, args.repeat))
+        if args.skip_display:
+            results["display"] = {"skipped": "--skip-display"}
+        else:
+            display = bench_display(project_dir, args.repeat)
+            results.update({"display": display} if "skipped" in display else display)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for name, result in results.items():
+        if "best" in result:
+            print(f"{name:<32}{result['best'] * 1e3:>10.1f} ms  (median {result['median'] * 1e3:.1f} ms)")
+        else:
+            print(f"{name:<32}skipped: {result['skipped']}")
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+              "platform": platform.platform(), "params": params, "project": project, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Micro-benchmark: frame-name extraction from sprite .yy files, old path vs gms2_cleaner_yy_module.
+
+    python benchmarks/bench_yy_parser.py [--frames 24] [--repeat 200]
+
+Compares the old regex + json.loads path, the streaming tokenizer alone, and read_frame_names
+(root "frames" section only) with json and, if installed, orjson. Builds in-memory .yy files in the 2.3 layout (indented, trailing commas, "frames" before a
+"sequence" with one keyframe per frame) and the 2024.x layout ("$GMSprite", "%Name", compact
+one-line objects), plus a .yyp of each, then times each reader on them.
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gms2_cleaner_yy_module as yy
+
+def yy_2_3(name, frames, tracks):
+    """Sprite .yy as GameMaker 2.3 writes it."""
+    out = ['{\n  "bboxMode": 0,\n  "collisionKind": 1,\n  "type": 0,\n  "origin": 4,\n',
+           '  "textureGroupId": {\n    "name": "Default",\n    "path": "texturegroups/Default",\n  },\n',
+           '  "frames": [\n']
+    for f in frames:
+        out.append(f'    {{"compositeImage":{{"FrameId":{{"name":"{f}","path":"sprites/{name}/{name}.yy",}},'
+                   f'"LayerId":null,"resourceVersion":"1.0","name":"imported","tags":[],"resourceType":"GMSpriteBitmap",}},'
+                   f'"images":[{{"FrameId":{{"name":"{f}","path":"sprites/{name}/{name}.yy",}},"LayerId":{{"name":"{uuid.uuid4()}",'
+                   f'"path":"sprites/{name}/{name}.yy",}},"resourceVersion":"1.0","name":"","tags":[],"resourceType":"GMSpriteBitmap",}},],'
+                   f'"parent":{{"name":"{name}","path":"sprites/{name}/{name}.yy",}},"resourceVersion":"1.0","name":"{f}","tags":[],"resourceType":"GMSpriteFrame",}},\n')
+    out.append('  ],\n  "sequence": {\n    "spriteId": {"name":"%s","path":"sprites/%s/%s.yy",},\n    "tracks": [\n' % (name, name, name))
+    for _ in range(tracks):
+        out.append('      {"name":"frames","spriteId":null,"keyframes":{"Keyframes":[\n')
+        for i, f in enumerate(frames):
+            out.append(f'            {{"id":"{uuid.uuid4()}","Key":{i}.0,"Length":1.0,"Stretch":false,"Disabled":false,"IsCreationKey":false,'
+                       f'"Channels":{{"0":{{"Id":{{"name":"{f}","path":"sprites/{name}/{name}.yy",}},"resourceVersion":"1.0","resourceType":"SpriteFrameKeyframe",}},}},'
+                       f'"resourceVersion":"1.0","resourceType":"Keyframe<SpriteFrameKeyframe>",}},\n')
+        out.append('          ],"resourceVersion":"1.0","resourceType":"KeyframeStore<SpriteFrameKeyframe>",},"trackColour":0,"inheritsTrackColour":true,'
+                   '"builtinName":0,"traits":0,"interpolation":1,"tracks":[],"events":[],"modifiers":[],"isCreationTrack":false,'
+                   '"resourceVersion":"1.0","tags":[],"resourceType":"GMSpriteFramesTrack",},\n')
+    out.append('    ],\n    "visibleRange": null,\n    "lockOrigin": false,\n  },\n')
+    out.append('  "layers": [\n    {"visible":true,"isLocked":false,"blendMode":0,"opacity":100.0,"displayName":"default","resourceVersion":"1.0","name":"%s","tags":[],"resourceType":"GMImageLayer",},\n  ],\n' % uuid.uuid4())
+    out.append('  "parent": {\n    "name": "Sprites",\n    "path": "folders/Sprites.yy",\n  },\n')
+    out.append('  "resourceVersion": "1.0",\n  "name": "%s",\n  "tags": [],\n  "resourceType": "GMSprite",\n}' % name)
+    return "".join(out)
+
+def yy_2024(name, frames, tracks):
+    """Sprite .yy as GameMaker 2024.x writes it: "$Type" version keys and sorted keys."""
+    out = ['{\n  "$GMSprite":"v2",\n  "%Name":"', name, '",\n  "bboxMode":0,\n  "bbox_bottom":63,\n  "collisionKind":1,\n',
+           '  "frames":[\n']
+    for f in frames:
+        out.append(f'    {{"$GMSpriteFrame":"v1","%Name":"{f}","name":"{f}","resourceType":"GMSpriteFrame","resourceVersion":"2.0",}},\n')
+    out.append('  ],\n  "gridX":0,\n  "gridY":0,\n  "height":64,\n')
+    out.append('  "layers":[\n    {"$GMImageLayer":"","%%Name":"%s","blendMode":0,"displayName":"default","isLocked":false,"name":"%s","opacity":100.0,"resourceType":"GMImageLayer","resourceVersion":"2.0","visible":true,},\n  ],\n' % ((uuid.uuid4(),) * 2))
+    out.append('  "name":"%s",\n  "origin":4,\n  "parent":{\n    "name":"Sprites",\n    "path":"folders/Sprites.yy",\n  },\n' % name)
+    out.append('  "resourceType":"GMSprite",\n  "resourceVersion":"2.0",\n  "sequence":{\n    "$GMSequence":"v1",\n    "%%Name":"%s",\n    "tracks":[\n' % name)
+    for _ in range(tracks):
+        out.append('      {"$GMSpriteFramesTrack":"","builtinName":0,"events":[],"inheritsTrackColour":true,"interpolation":1,"isCreationTrack":false,"keyframes":{"$KeyframeStore<SpriteFrameKeyframe>":"","Keyframes":[\n')
+        for i, f in enumerate(frames):
+            out.append(f'            {{"$Keyframe<SpriteFrameKeyframe>":"","Channels":{{"0":{{"$SpriteFrameKeyframe":"","Id":{{"name":"{f}","path":"sprites/{name}/{name}.yy",}},'
+                       f'"resourceType":"SpriteFrameKeyframe","resourceVersion":"2.0",}},}},"Disabled":false,"id":"{uuid.uuid4()}","IsCreationKey":false,"Key":{i}.0,'
+                       f'"Length":1.0,"resourceType":"Keyframe<SpriteFrameKeyframe>","resourceVersion":"2.0","Stretch":false,}},\n')
+        out.append('          ],"resourceType":"KeyframeStore<SpriteFrameKeyframe>","resourceVersion":"2.0",},"modifiers":[],"name":"frames","resourceType":"GMSpriteFramesTrack","resourceVersion":"2.0","spriteId":null,"trackColour":0,"tracks":[],"traits":0,},\n')
+    out.append('    ],\n    "visibleRange":null,\n  },\n  "swatchColours":null,\n  "type":0,\n  "width":64,\n}')
+    return "".join(out)
+
+def yyp(names, compact):
+    sep = ":" if compact else ": "
+    rows = "".join(f'    {{"id":{{"name"{sep}"{n}","path"{sep}"sprites/{n}/{n}.yy",}},{"" if compact else chr(34) + "order" + chr(34) + ": 0,"}}},\n'
+                   for n in names)
+    return '{\n  "resources": [\n' + rows + '  ],\n  "Options": [],\n}'
+
+def legacy_frame_names(text):
+    """What the scanner did before: strip trailing commas with two regexes, then json.loads."""
+    text = re.sub(r',\s*([\]}])', r'\1', text)
+    text = re.sub(r',\s*(\n\s*[\]}])', r'\1', text)
+    names = set()
+    for frame in json.loads(text).get("frames", []):
+        for key in ("name", "%Name"):
+            if key in frame and isinstance(frame[key], str):
+                names.add(frame[key])
+    return names
+
+def legacy_sprite_folders(text):
+    folders = set()
+    for line in text.splitlines():
+        if '"path": "sprites/' in line:
+            folders.add(line.split('"path": "sprites/')[1].split('/')[0])
+    return folders
+
+def tokenizer_frame_names(text):
+    """The streaming fallback on its own."""
+    return set(yy._collect(text, "frames", yy.FRAME_NAME_KEYS, 3))
+
+def with_backend(fn, loads):
+    def run(text):
+        saved, yy._loads = yy._loads, loads
+        try:
+            return fn(text)
+        finally:
+            yy._loads = saved
+    return run
+
+def best_of(fn, text, repeat):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(text)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=24)
+    parser.add_argument("--tracks", type=int, default=1, help="sequence tracks per sprite")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    random.seed(1)
+    frames = [str(uuid.UUID(int=random.getrandbits(128))) for _ in range(args.frames)]
+    readers = [("legacy regex+json", legacy_frame_names), ("tokenizer", tokenizer_frame_names),
+               ("section json", with_backend(yy.read_frame_names, json.loads))]
+    if yy.orjson is not None:
+        readers.append(("section orjson", with_backend(yy.read_frame_names, yy.orjson.loads)))
+
+    print(f"{'file':<22}{'size':>9}  " + "".join(f"{label:>20}" for label, _ in readers) + f"{'best':>10}")
+    for label, make in (("sprite.yy 2.3", yy_2_3), ("sprite.yy 2024.x", yy_2024)):
+        for tracks in sorted({args.tracks, args.tracks * 20}):
+            text = make("spr_bench", frames, tracks)
+            expected = legacy_frame_names(text)
+            assert all(fn(text) == expected for _, fn in readers), label
+            times = [best_of(fn, text, args.repeat) for _, fn in readers]
+            print(f"{label + f' x{tracks}tr':<22}{len(text):>9}  " + "".join(f"{t * 1e6:>17.1f} us" for t in times)
+                  + f"{times[0] / min(times[1:]):>9.1f}x")
+
+    names = [f"spr_{i}" for i in range(2000)]
+    print()
+    for label, compact in (("project.yyp 2.3", False), ("project.yyp 2024.x", True)):
+        text = yyp(names, compact)
+        legacy = best_of(legacy_sprite_folders, text, 20)
+        new = best_of(yy.read_sprite_folders, text, 20)
+        print(f"{label:<22}{len(text):>9}  legacy {legacy * 1e3:.2f} ms ({len(legacy_sprite_folders(text))} folders)"
+              f"  reader {new * 1e3:.2f} ms ({len(yy.read_sprite_folders(text))} folders)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Write a synthetic GameMaker project for benchmarks.
+
+    python benchmarks/make_project.py out_dir [--sprites 500] [--frames 4] [--ghost-ratio 0.25]
+        [--layer-depth 1] [--duplicate-ratio 0.1] [--variant 2.3|2024] [--seed 1]
+
+Each sprite folder gets a .yy (bench_yy_parser's 2.3 or 2024.x layout), one small real PNG per
+frame and a layers/<frame>/ folder per frame. ghost-ratio adds that many extra root PNGs and
+layer folders per frame that no .yy names; layer-depth nests layer PNGs that many folders deep;
+duplicate-ratio makes that share of PNGs byte copies of an earlier one. The same arguments
+always write the same PNGs and frame names, so scans find the same things.
+"""
+import os
+import sys
+import zlib
+import uuid
+import struct
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_yy_parser import yy_2_3, yy_2024, yyp
+
+VARIANTS = {"2.3": (yy_2_3, False), "2024": (yy_2024, True)}
+
+def png_bytes(rgb, size=16):
+    """A solid-colour RGB PNG, without needing Pillow."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    row = b"\0" + bytes(rgb) * size
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * size)) + chunk(b"IEND", b""))
+
+def make_project(root, sprites=500, frames=4, ghost_ratio=0.25, layer_depth=1, duplicate_ratio=0.1,
+                 variant="2.3", seed=1):
+    """Write the project under root and return counts of what was written."""
+    rng = random.Random(seed)
+    make_yy, compact = VARIANTS[variant]
+    written = []
+    stats = {"sprites": sprites, "pngs": 0, "ghost_pngs": 0, "ghost_layer_folders": 0, "duplicates": 0}
+
+    def write_png(path):
+        if written and rng.random() < duplicate_ratio:
+            data = rng.choice(written)
+            stats["duplicates"] += 1
+        else:
+            # Sizes vary a little so duplicate detection has real size buckets to sort through
+            data = png_bytes((rng.randrange(256), rng.randrange(256), rng.randrange(256)), rng.choice((8, 16, 24)))
+            written.append(data)
+        with open(path, "wb") as f:
+            f.write(data)
+        stats["pngs"] += 1
+
+    def layer_folder(folder_path, name):
+        path = os.path.join(folder_path, "layers", name)
+        for depth in range(layer_depth - 1):
+            path = os.path.join(path, f"group{depth}")
+        os.makedirs(path, exist_ok=True)
+        write_png(os.path.join(path, f"{uuid.UUID(int=rng.getrandbits(128))}.png"))
+
+    names = [f"spr_bench_{i}" for i in range(sprites)]
+    for name in names:
+        folder_path = os.path.join(root, "sprites", name)
+        os.makedirs(folder_path, exist_ok=True)
+        frame_names = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(frames)]
+        with open(os.path.join(folder_path, f"{name}.yy"), "w", encoding="utf-8") as f:
+            f.write(make_yy(name, frame_names, 1))
+        ghosts = sum(1 for _ in range(frames) if rng.random() < ghost_ratio)
+        for frame in frame_names:
+            write_png(os.path.join(folder_path, f"{frame}.png"))
+            layer_folder(folder_path, frame)
+        for _ in range(ghosts):
+            write_png(os.path.join(folder_path, f"{uuid.UUID(int=rng.getrandbits(128))}.png"))
+            layer_folder(folder_path, str(uuid.UUID(int=rng.getrandbits(128))))
+        stats["ghost_pngs"] += ghosts
+        stats["ghost_layer_folders"] += ghosts
+
+    with open(os.path.join(root, "bench.yyp"), "w", encoding="utf-8") as f:
+        f.write(yyp(names, compact))
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--sprites", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=4)
+    parser.add_argument("--ghost-ratio", type=float, default=0.25)
+    parser.add_argument("--layer-depth", type=int, default=1)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--variant", choices=sorted(VARIANTS), default="2.3")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    stats = make_project(args.out_dir, args.sprites, args.frames, args.ghost_ratio, args.layer_depth,
+                         args.duplicate_ratio, args.variant, args.seed)
+    print(", ".join(f"{k}: {v}" for k, v in stats.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Backup store for deleted files, plus a command line to list and restore sessions:
+
+    python gms2_cleaner_backup_module.py [backup_dir] [--project NAME]   # list sessions
+    python gms2_cleaner_backup_module.py session.json [path ...]          # restore all, or some paths
+
+Restored files go back to their original paths; files already there are left alone.
+"""
+import os
+import re
+import sys
+import json
+import zlib
+import queue
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime
+
+from gms2_cleaner_lock_module import try_lock, lock, unlock
+
+BLOB_DIR = "blobs"
+# Every open BackupWriter holds a lock file in LOCK_DIR; GC_LOCK is held while one registers and
+# while garbage is collected, so a collection never starts with a writer midway
+LOCK_DIR = "locks"
+GC_LOCK = "gc.lock"
+# Already compressed; deflating these costs CPU for a percent or two
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".ogg", ".mp3", ".wav", ".zip"}
+COPY_CHUNK = 1024 * 1024
+# Files up to this size are read into memory once, so known content is never written again
+MEMORY_LIMIT = 16 * 1024 * 1024
+SESSION_PATTERN = r"_\d{8}_\d{6}(_\d+)?\.(json|zip)$"
+DEFAULT_BACKUP_DIR = os.path.expanduser("~/Documents/GMS2Cleaner_Backups")
+
+class BackupWriter:
+    """Copy deleted files into the content-addressed store on a worker thread while the moves carry on.
+
+    Blobs live in backup_dir/blobs named by the hash of their content, so a frame backed up by an
+    earlier session is not written again. Each session is a small <project>_<timestamp>.json
+    manifest of original path -> blob. collect_garbage leaves the store alone while a writer is open,
+    since its blobs aren't in any manifest until close()."""
+
+    def __init__(self, backup_dir, session_name, project_name, total=0, progress_callback=None):
+        self.backup_dir = backup_dir
+        # The trash session's timestamp; close() numbers the manifest if backup_dir already has one
+        stamp = re.match(r"\d{8}_\d{6}", session_name)
+        self.stamp = stamp.group(0) if stamp else datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.manifest_path = None
+        self.project_name = project_name
+        self.total = total
+        self.progress_callback = progress_callback
+        self.files = []
+        self.done = 0
+        self.new_bytes = 0
+        self.queue = queue.Queue()
+        os.makedirs(os.path.join(backup_dir, BLOB_DIR), exist_ok=True)
+        os.makedirs(os.path.join(backup_dir, LOCK_DIR), exist_ok=True)
+        gc_lock = lock(os.path.join(backup_dir, LOCK_DIR, GC_LOCK))
+        try:
+            self.lock = lock(os.path.join(backup_dir, LOCK_DIR, f"writer_{os.getpid()}_{id(self)}.lock"))
+        finally:
+            unlock(gc_lock)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add(self, current_path, original_path):
+        self.queue.put((current_path, original_path))
+
+    def close(self):
+        """Wait for queued files, then write the session manifest; returns its path."""
+        self.queue.put(None)
+        self.thread.join()
+        manifest = {"project": self.project_name, "created": datetime.now().isoformat(timespec="seconds"),
+                    "files": self.files}
+        try:
+            f, self.manifest_path = _create_manifest(self.backup_dir, f"{self.project_name}_{self.stamp}")
+            with f:
+                json.dump(manifest, f, indent=1)
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            # Collection waits for this, so it never sees a half-written manifest
+            unlock(self.lock, remove=True)
+        return self.manifest_path
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            current_path, original_path = item
+            try:
+                if os.path.isdir(current_path):
+                    for root, _, files in os.walk(current_path):
+                        for file in files:
+                            path = os.path.join(root, file)
+                            self._store(path, os.path.join(original_path, os.path.relpath(path, current_path)))
+                else:
+                    self._store(current_path, original_path)
+            except Exception as e:
+                print(f"Failed to back up: {original_path} – {e}", file=sys.stderr)
+            self.done += 1
+            if self.progress_callback:
+                self.progress_callback(self.done / max(self.total, 1) * 100)
+
+    def _store(self, path, original_path):
+        compress = os.path.splitext(path)[1].lower() not in STORED_EXTENSIONS
+        suffix = ".z" if compress else ""
+        size = os.path.getsize(path)
+        if size <= MEMORY_LIMIT:
+            with open(path, "rb") as f:
+                data = f.read()
+            blob = _blob_name(hashlib.blake2b(data, digest_size=20).hexdigest(), suffix)
+            blob_path = os.path.join(self.backup_dir, BLOB_DIR, blob)
+            if not os.path.exists(blob_path):
+                _write_blob(blob_path, zlib.compress(data, 6) if compress else data)
+                self.new_bytes += size
+        else:
+            blob = self._store_stream(path, compress, suffix)
+        self.files.append({"path": original_path, "blob": blob, "size": size})
+
+    def _store_stream(self, path, compress, suffix):
+        # Too big to hold: hash while writing a temp blob, then keep it only if the content is new
+        tmp_path = os.path.join(self.backup_dir, BLOB_DIR, f"incoming_{_tmp_suffix()}.tmp")
+        digest = hashlib.blake2b(digest_size=20)
+        compressor = zlib.compressobj(6) if compress else None
+        with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(COPY_CHUNK), b""):
+                digest.update(chunk)
+                dst.write(compressor.compress(chunk) if compressor else chunk)
+            if compressor:
+                dst.write(compressor.flush())
+        blob = _blob_name(digest.hexdigest(), suffix)
+        blob_path = os.path.join(self.backup_dir, BLOB_DIR, blob)
+        if os.path.exists(blob_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(tmp_path, blob_path)
+            self.new_bytes += os.path.getsize(path)
+        return blob
+
+def _create_manifest(backup_dir, base):
+    """Open a new manifest file for writing, created exclusively: <base>.json, else <base>_1.json
+    and so on. Another delete in the same second, or another process, never overwrites one."""
+    n = 0
+    while True:
+        path = os.path.join(backup_dir, f"{base}_{n}.json" if n else f"{base}.json")
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            n += 1
+            continue
+        return os.fdopen(fd, "w", encoding="utf-8"), path
+
+def _tmp_suffix():
+    # Unique across the processes and threads sharing a store
+    return f"{os.getpid()}_{threading.get_ident()}"
+
+def _blob_name(hexdigest, suffix):
+    return f"{hexdigest[:2]}/{hexdigest}{suffix}"
+
+def _write_blob(blob_path, data):
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+    tmp_path = f"{blob_path}.{_tmp_suffix()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, blob_path)
+
+def list_sessions(backup_dir, project_name=None):
+    """Session manifests (and pre-store .zip backups), oldest first."""
+    if not os.path.isdir(backup_dir):
+        return []
+    prefix = re.escape(project_name) if project_name else r".+"
+    pattern = re.compile(prefix + SESSION_PATTERN)
+    names = [f for f in os.listdir(backup_dir) if pattern.fullmatch(f)]
+    # Sort on the timestamp, not the project name
+    names.sort(key=lambda f: re.search(SESSION_PATTERN, f).group(0))
+    return [os.path.join(backup_dir, f) for f in names]
+
+def read_manifest(manifest_path):
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def restore_backup(manifest_path, paths=None):
+    """Write files back to their original paths (all, or just those in paths; a folder in paths
+    takes everything under it). Existing files are left alone. Returns the paths restored."""
+    backup_dir = os.path.dirname(manifest_path)
+    wanted = None if paths is None else {os.path.abspath(p) for p in paths}
+    restored = []
+    for entry in read_manifest(manifest_path)["files"]:
+        path = entry["path"]
+        if (wanted is not None and not _under(path, wanted)) or os.path.exists(path):
+            continue
+        blob_path = os.path.join(backup_dir, BLOB_DIR, entry["blob"])
+        try:
+            src = open(blob_path, "rb")
+        except OSError as e:
+            print(f"Failed to restore: {path} – {e}", file=sys.stderr)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        decompressor = zlib.decompressobj() if blob_path.endswith(".z") else None
+        with src, open(path, "wb") as dst:
+            for chunk in iter(lambda: src.read(COPY_CHUNK), b""):
+                dst.write(decompressor.decompress(chunk) if decompressor else chunk)
+            if decompressor:
+                dst.write(decompressor.flush())
+        restored.append(path)
+    return restored
+
+def _under(path, folders):
+    while path not in folders:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+    return True
+
+def collect_garbage(backup_dir):
+    """Delete blobs no session manifest refers to. Returns the bytes freed; nothing is deleted
+    while a BackupWriter (in any process) is still open on backup_dir."""
+    lock_dir = os.path.join(backup_dir, LOCK_DIR)
+    if not os.path.isdir(os.path.join(backup_dir, BLOB_DIR)):
+        return 0
+    os.makedirs(lock_dir, exist_ok=True)
+    gc_lock = try_lock(os.path.join(lock_dir, GC_LOCK))
+    if gc_lock is None:
+        return 0  # Another collection, or a writer registering; the next delete collects
+    try:
+        for name in os.listdir(lock_dir):
+            if not name.startswith("writer_"):
+                continue
+            writer = try_lock(os.path.join(lock_dir, name))
+            if writer is None:
+                return 0
+            unlock(writer, remove=True)  # Left by a writer that died before close()
+        return _collect(backup_dir)
+    finally:
+        unlock(gc_lock)
+
+def _collect(backup_dir):
+    refs = Counter()
+    for session in list_sessions(backup_dir):
+        if session.endswith(".json"):
+            try:
+                refs.update(entry["blob"] for entry in read_manifest(session)["files"])
+            except (OSError, ValueError, KeyError) as e:
+                # Manifests are complete before collection can run, so this one was cut short by a
+                # crash; restore_backup can't read it either, so it holds no blobs back
+                print(f"Skipping damaged backup manifest {session}: {e}", file=sys.stderr)
+    freed = 0
+    blob_root = os.path.join(backup_dir, BLOB_DIR)
+    if not os.path.isdir(blob_root):
+        return 0
+    for shard in os.listdir(blob_root):
+        shard_dir = os.path.join(blob_root, shard)
+        if not os.path.isdir(shard_dir):
+            continue  # incoming_*.tmp of a writer that may still be running
+        for name in os.listdir(shard_dir):
+            if name.endswith(".tmp"):
+                continue
+            if refs[f"{shard}/{name}"] == 0:
+                path = os.path.join(shard_dir, name)
+                try:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    pass
+        try:
+            os.rmdir(shard_dir)
+        except OSError:
+            pass
+    return freed
+
+def _list(backup_dir, project_name):
+    for session in list_sessions(backup_dir, project_name):
+        name = os.path.basename(session)
+        if session.endswith(".zip"):
+            print(f"{name}  (older zip backup; open it with any zip tool)")
+            continue
+        try:
+            manifest = read_manifest(session)
+        except (OSError, ValueError) as e:
+            print(f"{name}  damaged: {e}")
+            continue
+        size = sum(entry["size"] for entry in manifest["files"])
+        print(f"{name}  {manifest['created']}  {len(manifest['files'])} files, {size} bytes")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List backup sessions, or restore one.")
+    parser.add_argument("target", nargs="?", default=DEFAULT_BACKUP_DIR,
+                        help="backup folder to list (default %(default)s), or a session .json to restore")
+    parser.add_argument("paths", nargs="*", help="restore only these original paths")
+    parser.add_argument("--project", help="list only this project's sessions")
+    args = parser.parse_args(argv)
+    if os.path.isdir(args.target):
+        _list(args.target, args.project)
+        return 0
+    if not args.target.endswith(".json"):
+        parser.error(f"{args.target} is not a backup folder or session manifest")
+    restored = restore_backup(args.target, args.paths or None)
+    for path in restored:
+        print(path)
+    print(f"Restored {len(restored)} files.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Headless batch cleaner: scan (and optionally clean) many GameMaker projects without the GUI.
+
+    python gms2_cleaner_batch_module.py path/to/projects --report report.jsonl
+    python gms2_cleaner_batch_module.py game.yyp --apply --no-backup
+
+Directories are searched recursively for .yyp files. Nothing is deleted unless --apply is given.
+"""
+import os
+import sys
+import json
+import hashlib
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gms2_cleaner_scan_module import scan_project_all, fill_layer_pngs
+from gms2_cleaner_refs_module import unreferenced_sprites
+from gms2_cleaner_snapshot_module import snapshot_path, project_state, save_snapshot
+from gms2_cleaner_deletion_module import delete_files, trash_root_for, TRASH_FOLDER_NAME
+
+def find_projects(paths):
+    projects = []
+    for path in paths:
+        if path.lower().endswith(".yyp") and os.path.isfile(path):
+            projects.append(os.path.abspath(path))
+            continue
+        for root, dirs, files in os.walk(path):
+            # A project's own folders never contain further projects
+            yyps = [f for f in files if f.lower().endswith(".yyp")]
+            if yyps:
+                projects.extend(os.path.join(os.path.abspath(root), f) for f in sorted(yyps))
+                dirs[:] = []
+    return projects
+
+def _stderr_log(message, level="info", *args):
+    if args:
+        message = message % args
+    print(f"[{level.upper()}] {message}", file=sys.stderr)
+
+def clean_project(yyp_path, apply=False, layers=True, trash_dir=None, backup_dir=None,
+                  scan_workers=None, use_cache=False, verbose=False, references=True,
+                  snapshot_dir=None):
+    """Scan one project and, with apply, delete what it found. Returns a report dict."""
+    started = time.perf_counter()
+    project_dir = os.path.dirname(yyp_path)
+    project_name = os.path.splitext(os.path.basename(yyp_path))[0]
+    report = {"project": project_name, "yyp": yyp_path, "applied": apply}
+    try:
+        state = project_state(project_dir) if snapshot_dir else None
+        sprite_data, file_sizes, _, layer_data = scan_project_all(
+            project_dir, log_fn=_stderr_log if verbose else None, max_workers=scan_workers,
+            use_cache=use_cache, layers=layers, references=references)
+        fill_layer_pngs(layer_data)  # The byte totals need every layer folder listed
+        scanned = time.perf_counter()
+        if snapshot_dir:
+            # Saved before anything is deleted, so it records what the scan found
+            report["snapshot"] = snapshot_path(project_dir, snapshot_dir)
+            save_snapshot(report["snapshot"], project_dir, state, sprite_data, file_sizes, layer_data)
+
+        sprite_paths = [path for f in sprite_data for _, path, _ in sprite_data[f]["sprites"]]
+        layer_paths = [folder_path for f in layer_data for _, folder_path, _ in layer_data[f]["unused_folders"]]
+        report.update({
+            "sprite_folders": len(sprite_data),
+            "flagged_folders": sum(1 for f in sprite_data if sprite_data[f]["sprites"]),
+            "unused_sprites": len(sprite_paths),
+            "unused_sprite_bytes": sum(sum(sprite_data[f]["sprites"].sizes) for f in sprite_data),
+            "unused_layer_folders": len(layer_paths),
+            "unused_layer_bytes": sum(sum(pngs.sizes) for f in layer_data for _, _, pngs in layer_data[f]["unused_folders"]),
+            "deleted": 0,
+        })
+        if references:
+            # Reported only; nothing referenced or not is ever deleted as a whole sprite
+            report["unreferenced_sprites"] = unreferenced_sprites(sprite_data)
+        timings = {"scan": round(scanned - started, 4)}
+        if apply and (sprite_paths or layer_paths):
+            # Projects often share a name, so shared trash and backup folders also carry a hash of the path
+            project_key = f"{project_name}_{hashlib.sha1(project_dir.encode('utf-8')).hexdigest()[:8]}"
+            if trash_dir:
+                trash_root = os.path.join(trash_dir, project_key)
+            else:
+                trash_root = trash_root_for(project_dir)
+            if backup_dir:
+                # One store per project: its own manifests, retention and garbage collection
+                backup_dir = os.path.join(backup_dir, project_key)
+            deleted = delete_files(sprite_paths + layer_paths, trash_root, project_name,
+                                   allow_backup=backup_dir is not None, backup_dir=backup_dir)
+            report["deleted"] = len(deleted)
+            report["delete_failures"] = len(sprite_paths) + len(layer_paths) - len(deleted)
+            timings["delete"] = round(time.perf_counter() - scanned, 4)
+        timings["total"] = round(time.perf_counter() - started, 4)
+        report["timings"] = timings
+    except Exception as e:
+        report["error"] = str(e)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan and clean GameMaker projects without the GUI.")
+    parser.add_argument("paths", nargs="+", help=".yyp files or directories to search for them")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", dest="apply", action="store_false", default=False,
+                      help="only report what would be deleted (default)")
+    mode.add_argument("--apply", dest="apply", action="store_true", help="move unused files to the trash")
+    parser.add_argument("--sprites-only", action="store_true", help="skip the layer folder scan")
+    parser.add_argument("--report", help="write JSON Lines here instead of stdout")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="projects scanned at once")
+    parser.add_argument("--scan-workers", type=int, default=4, help="threads per project scan")
+    parser.add_argument("--cache", action="store_true", help="use the persistent scan cache")
+    parser.add_argument("--no-references", action="store_true",
+                        help="skip listing sprites no object, room, sequence or script names")
+    parser.add_argument("--trash", help="trash root (default: %s next to each project)" % TRASH_FOLDER_NAME)
+    parser.add_argument("--backup-dir", default=os.path.expanduser("~/Documents/GMS2Cleaner_Backups"))
+    parser.add_argument("--no-backup", action="store_true")
+    parser.add_argument("--snapshot-dir", help="save each project's scan here as a SQLite snapshot")
+    parser.add_argument("--verbose", action="store_true", help="log scan progress to stderr")
+    args = parser.parse_args(argv)
+
+    projects = find_projects(args.paths)
+    if not projects:
+        print("No .yyp projects found.", file=sys.stderr)
+        return 2
+
+    options = dict(apply=args.apply, layers=not args.sprites_only, trash_dir=args.trash,
+                   backup_dir=None if args.no_backup else args.backup_dir,
+                   scan_workers=args.scan_workers, use_cache=args.cache, verbose=args.verbose,
+                   references=not args.no_references, snapshot_dir=args.snapshot_dir)
+    out = open(args.report, "w", encoding="utf-8") if args.report else sys.stdout
+    failures = 0
+    try:
+        if args.jobs <= 1 or len(projects) == 1:
+            reports = (clean_project(p, **options) for p in projects)
+            for report in reports:
+                failures += "error" in report
+                out.write(json.dumps(report) + "\n")
+                out.flush()
+        else:
+            with ProcessPoolExecutor(max_workers=min(args.jobs, len(projects))) as executor:
+                futures = [executor.submit(clean_project, p, **options) for p in projects]
+                for future in as_completed(futures):
+                    report = future.result()
+                    failures += "error" in report
+                    out.write(json.dumps(report) + "\n")
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
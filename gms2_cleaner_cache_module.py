@@ -0,0 +1,81 @@
+import os
+import json
+import sqlite3
+
+# Lives next to SETTINGS_FILE in gms2_cleaner_theme_module.
+CACHE_FILE = os.path.expanduser("~/.gms2_cleaner_scan_cache.db")
+CACHE_VERSION = 2
+
+def folder_fingerprint(folder_path, yy_path):
+    """Return (yy mtime, yy size, folder mtime). It covers the .yy only: a PNG rewritten in place
+    doesn't change it, so PNG sizes are never cached."""
+    yy_stat = os.stat(yy_path)
+    dir_stat = os.stat(folder_path)
+    return (yy_stat.st_mtime_ns, yy_stat.st_size, dir_stat.st_mtime_ns)
+
+class ScanCache:
+    def __init__(self, project_dir, cache_file=CACHE_FILE):
+        self.project_dir = os.path.abspath(project_dir)
+        self.entries = {}
+        self.updates = {}
+        self.conn = None
+        try:
+            self.conn = sqlite3.connect(cache_file)
+            self._check_version()
+            self._evict_missing_projects()
+            rows = self.conn.execute(
+                "SELECT folder, yy_mtime, yy_size, dir_mtime, names FROM folders WHERE project = ?",
+                (self.project_dir,))
+            for folder, yy_mtime, yy_size, dir_mtime, names in rows:
+                self.entries[folder] = ((yy_mtime, yy_size, dir_mtime), names)
+        except sqlite3.Error:
+            self.close()
+
+    def _check_version(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS folders")
+            self.conn.execute("PRAGMA user_version = %d" % CACHE_VERSION)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS folders (
+            project TEXT, folder TEXT, yy_mtime INTEGER, yy_size INTEGER, dir_mtime INTEGER,
+            names TEXT, PRIMARY KEY (project, folder))""")
+        self.conn.commit()
+
+    def _evict_missing_projects(self):
+        projects = [row[0] for row in self.conn.execute("SELECT DISTINCT project FROM folders")]
+        missing = [(p,) for p in projects if not os.path.isdir(p)]
+        if missing:
+            self.conn.executemany("DELETE FROM folders WHERE project = ?", missing)
+            self.conn.commit()
+
+    def get(self, folder, fingerprint):
+        """Return the frame names if the folder is unchanged, else None."""
+        entry = self.entries.get(folder)
+        if entry is None or entry[0] != fingerprint:
+            return None
+        return json.loads(entry[1])
+
+    def put(self, folder, fingerprint, names):
+        self.updates[folder] = (fingerprint, json.dumps(sorted(names)))
+
+    def save(self, seen_folders):
+        """Write new entries and drop folders that were not seen in this scan (None keeps them all)."""
+        if self.conn is None:
+            return
+        try:
+            stale = [] if seen_folders is None else [(self.project_dir, f) for f in self.entries if f not in seen_folders]
+            self.conn.executemany("DELETE FROM folders WHERE project = ? AND folder = ?", stale)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.project_dir, folder, fp[0], fp[1], fp[2], names)
+                 for folder, (fp, names) in self.updates.items()])
+            self.conn.commit()
+        except sqlite3.Error:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,98 @@
+from tkinter import font as tkfont
+
+class VirtualCheckList:
+    """A check list drawn straight onto a Canvas. Only the rows in view exist as canvas items,
+    and check state lives in a bytearray plus a dict of changes, not in Tk variables."""
+
+    def __init__(self, canvas, scrollbar, font_size=10):
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.rows = []  # (text, path or None for plain labels, indent)
+        self.initial = bytearray()
+        self.overrides = {}
+        self.base = None  # Set by select_all(); overrides the initial states
+        self.on_click = None
+        self.bg = "#ffffff"
+        self.fg = "#000000"
+        self.set_font(font_size)
+
+        self.canvas.configure(yscrollcommand=self._scrolled, yscrollincrement=self.row_height)
+        self.scrollbar.configure(command=self.canvas.yview)
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<Button-1>", self._clicked)
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(int(-e.delta / 120), "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    def set_font(self, font_size):
+        self.font = ("Arial", font_size)
+        self.row_height = tkfont.Font(root=self.canvas, font=self.font).metrics("linespace") + 4
+
+    def set_rows(self, rows):
+        """rows is a list of (text, path, indent, checked); path None makes a plain label."""
+        self.rows = [(text, path, indent) for text, path, indent, _ in rows]
+        self.initial = bytearray(1 if checked else 0 for _, _, _, checked in rows)
+        self.overrides = {}
+        self.base = None
+        self.canvas.configure(scrollregion=(0, 0, 0, len(self.rows) * self.row_height))
+        self.canvas.yview_moveto(0)
+        self.redraw()
+
+    def is_checked(self, i):
+        state = self.overrides.get(i)
+        if state is None:
+            state = self.base if self.base is not None else self.initial[i]
+        return bool(state)
+
+    def select_all(self, checked=True):
+        self.base = 1 if checked else 0
+        self.overrides = {}
+        self.redraw()
+
+    def checked_paths(self):
+        return [path for i, (_, path, _) in enumerate(self.rows) if path is not None and self.is_checked(i)]
+
+    def apply_theme(self, bg, fg, font_size):
+        self.bg = bg
+        self.fg = fg
+        self.canvas.configure(bg=bg)
+        if self.font[1] != font_size:
+            self.set_font(font_size)
+            self.canvas.configure(yscrollincrement=self.row_height,
+                                  scrollregion=(0, 0, 0, len(self.rows) * self.row_height))
+        self.redraw()
+
+    def _visible_range(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = max(0, int(top // self.row_height))
+        last = min(len(self.rows), int(bottom // self.row_height) + 1)
+        return first, last
+
+    def redraw(self):
+        self.canvas.delete("row")
+        first, last = self._visible_range()
+        h = self.row_height
+        for i in range(first, last):
+            text, path, indent = self.rows[i]
+            y = i * h
+            x = 4 + indent * 16
+            if path is not None:
+                box = h - 8
+                self.canvas.create_rectangle(x, y + 4, x + box, y + 4 + box, outline=self.fg,
+                                             fill=self.fg if self.is_checked(i) else self.bg, tags="row")
+                x += box + 6
+            self.canvas.create_text(x, y + h / 2, text=text, anchor="w", fill=self.fg, font=self.font, tags="row")
+
+    def _scrolled(self, first, last):
+        self.scrollbar.set(first, last)
+        self.redraw()
+
+    def _clicked(self, event):
+        i = int(self.canvas.canvasy(event.y) // self.row_height)
+        if i < 0 or i >= len(self.rows) or self.rows[i][1] is None:
+            return
+        self.overrides[i] = 0 if self.is_checked(i) else 1
+        self.redraw()
+        if self.on_click:
+            self.on_click(self.rows[i][1])
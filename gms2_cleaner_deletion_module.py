@@ -1,52 +1,141 @@
 import os
+import sys
+import json
+import errno
 import shutil
 from datetime import datetime
-import zipfile
+
+from gms2_cleaner_backup_module import BackupWriter, list_sessions, collect_garbage
+from gms2_cleaner_stats_module import STATS
+from gms2_cleaner_lock_module import try_lock, unlock
 
 TRASH_FOLDER_NAME = "_GMS2Cleaner_Trash"
+JOURNAL_NAME = "journal.jsonl"
+COMMIT_NAME = "committed"
+# Held by delete_files while it writes a session, in whatever process; recovery skips locked sessions
+LOCK_NAME = "lock"
 
-def delete_files(file_paths, trash_root, project_name, allow_backup=True, backup_dir=None):
-    deleted_files = []
-    os.makedirs(trash_root, exist_ok=True)
+def trash_root_for(project_dir):
+    """Trash folder beside the project, so deletes are renames on the same volume."""
+    project_dir = os.path.abspath(project_dir)
+    return os.path.join(os.path.dirname(project_dir), TRASH_FOLDER_NAME, os.path.basename(project_dir))
+
+def _fsync_dir(path):
+    # Windows can't open directories for fsync; NTFS journals the renames itself
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
+def _move(src, dst):
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+def _new_session(trash_root):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     session_dir = os.path.join(trash_root, f"delete_{timestamp}")
-    os.makedirs(session_dir, exist_ok=True)
+    n = 1
+    while os.path.exists(session_dir):
+        session_dir = os.path.join(trash_root, f"delete_{timestamp}_{n}")
+        n += 1
+    os.makedirs(os.path.join(session_dir, "files"))
+    return session_dir, os.path.basename(session_dir)[len("delete_"):]
 
-    if allow_backup and backup_dir:
-        os.makedirs(backup_dir, exist_ok=True)
-        zip_path = os.path.join(backup_dir, f"{project_name}_{timestamp}.zip")
-        zipf = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED)
-    else:
-        zipf = None
+def _write_journal(session_dir, project_name, entries):
+    path = os.path.join(session_dir, JOURNAL_NAME)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"version": 1, "project": project_name}) + "\n")
+        for src, dst in entries:
+            f.write(json.dumps({"src": src, "dst": dst}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    _fsync_dir(session_dir)
 
-    for path in file_paths:
+def _read_journal(session_dir):
+    with open(os.path.join(session_dir, JOURNAL_NAME), encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    entries = []
+    for n, line in enumerate(lines[1:], 2):
         try:
-            target_path = os.path.join(session_dir, os.path.basename(path))
-            if os.path.isfile(path):
-                shutil.move(path, target_path)
-                deleted_files.append(path)
-                if zipf:
-                    zipf.write(target_path, arcname=os.path.join(project_name, os.path.basename(path)))
-            elif os.path.isdir(path):
-                shutil.move(path, target_path)
-                deleted_files.append(path)
-                if zipf:
-                    for root, _, files in os.walk(target_path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            rel_path = os.path.relpath(file_path, session_dir)
-                            zipf.write(file_path, arcname=os.path.join(project_name, rel_path))
-        except Exception as e:
-            print(f"Failed to delete: {path} – {e}")
+            entry = json.loads(line)
+        except ValueError:
+            if n < len(lines):
+                raise
+            # Cut short by a crash while it was written; nothing was moved yet, since the
+            # journal is synced before the first move
+            break
+        entries.append((entry["src"], entry["dst"]))
+    return entries
+
+def _commit(session_dir):
+    with open(os.path.join(session_dir, COMMIT_NAME), "w") as f:
+        f.flush()
+        os.fsync(f.fileno())
+    _fsync_dir(session_dir)
+
+def delete_files(file_paths, trash_root, project_name, allow_backup=True, backup_dir=None, cancel_event=None, progress_callback=None):
+    """Move file_paths into a new trash session. The journal of original -> trash paths is on
+    disk before the first move, so the session can be undone or recovered after a crash."""
+    session_dir, session_name = _new_session(trash_root)
+    session_lock = try_lock(os.path.join(session_dir, LOCK_NAME))  # A new folder: nobody else has it
+    try:
+        return _delete_into(session_dir, session_name, file_paths, trash_root, project_name, allow_backup,
+                            backup_dir, cancel_event, progress_callback)
+    finally:
+        unlock(session_lock, remove=True)
+
+def _delete_into(session_dir, session_name, file_paths, trash_root, project_name, allow_backup, backup_dir,
+                 cancel_event, progress_callback):
+    deleted_files = []
+    # Index prefix keeps same-named frames from different folders apart
+    entries = [(os.path.abspath(path), os.path.join("files", f"{i:06d}_{os.path.basename(path)}"))
+               for i, path in enumerate(file_paths)]
+    with STATS.timer("delete: journal"):
+        _write_journal(session_dir, project_name, entries)
+
+    backup = None
+    if allow_backup and backup_dir and entries:
+        # The writer reports progress once it's behind the moves, which are only renames
+        backup = BackupWriter(backup_dir, session_name, project_name, total=len(entries),
+                              progress_callback=progress_callback)
+
+    with STATS.timer("delete: move"):
+        for i, (path, rel_target) in enumerate(entries):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if progress_callback and not backup:
+                progress_callback((i + 1) / len(entries) * 100)
+            try:
+                if not os.path.lexists(path):
+                    continue
+                target_path = os.path.join(session_dir, rel_target)
+                _move(path, target_path)
+                deleted_files.append(file_paths[i])
+                if backup:
+                    backup.add(target_path, path)
+            except Exception as e:
+                print(f"Failed to delete: {path} – {e}", file=sys.stderr)
+    STATS.count("files moved", len(deleted_files))
 
-    if zipf:
-        zipf.close()
-        cleanup_old_backups(backup_dir, project_name)
+    # One flush for the whole batch of renames, then mark the session complete
+    _fsync_dir(os.path.join(session_dir, "files"))
+    _commit(session_dir)
+
+    if backup:
+        with STATS.timer("delete: finish backup"):
+            backup.close()
+            cleanup_old_backups(backup_dir, project_name)
+        STATS.count("backup bytes written", backup.new_bytes)
 
     # Remove empty directories
-    for path in file_paths:
-        parent = os.path.dirname(path)
+    for parent in {os.path.dirname(path) for path in deleted_files}:
         while parent and parent != trash_root and os.path.exists(parent):
             try:
                 os.rmdir(parent)
@@ -56,32 +145,68 @@ def delete_files(file_paths, trash_root, project_name, allow_backup=True, backup
 
     return deleted_files
 
-def undo_last_delete(trash_root):
+def _replay(session_dir):
+    """Move a session's files back in reverse journal order. Returns (restored, left in trash)."""
+    restored = left = 0
+    for src, rel_target in reversed(_read_journal(session_dir)):
+        target_path = os.path.join(session_dir, rel_target)
+        if not os.path.lexists(target_path):
+            continue  # Never moved
+        if os.path.lexists(src):
+            print(f"Not restoring {src}: a file already exists there", file=sys.stderr)
+            left += 1
+            continue
+        os.makedirs(os.path.dirname(src), exist_ok=True)
+        _move(target_path, src)
+        restored += 1
+    if left:
+        # Keep the leftovers for manual recovery, but don't offer this session again
+        os.remove(os.path.join(session_dir, JOURNAL_NAME))
+    else:
+        shutil.rmtree(session_dir, ignore_errors=True)
+    return restored, left
+
+def _sessions(trash_root):
     if not os.path.isdir(trash_root):
-        return False
-    sessions = sorted(os.listdir(trash_root), reverse=True)
+        return []
+    return [os.path.join(trash_root, name) for name in sorted(os.listdir(trash_root), reverse=True)
+            if os.path.isfile(os.path.join(trash_root, name, JOURNAL_NAME))]
+
+def undo_last_delete(trash_root):
+    """Restore the newest session to its original paths. Returns the number of files restored."""
+    sessions = _sessions(trash_root)
     if not sessions:
-        return False
-    latest = sessions[0]
-    full_path = os.path.join(trash_root, latest)
-    for file in os.listdir(full_path):
-        src = os.path.join(full_path, file)
-        dst = os.path.join(os.getcwd(), file)
+        return 0
+    with STATS.timer("undo"):
+        return _replay(sessions[0])[0]
+
+def recover_sessions(trash_root, log_fn=None):
+    """Roll back sessions that never committed (the app died mid-delete). Returns files restored.
+    Sessions a delete is still writing, in any process, are skipped; a session that can't be
+    rolled back is logged and left for the next try."""
+    restored = 0
+    for session_dir in _sessions(trash_root):
+        if os.path.exists(os.path.join(session_dir, COMMIT_NAME)):
+            continue
+        session_lock = try_lock(os.path.join(session_dir, LOCK_NAME))
+        if session_lock is None:
+            continue
+        unlock(session_lock, remove=True)
         try:
-            shutil.move(src, dst)
-        except:
-            pass
-    shutil.rmtree(full_path, ignore_errors=True)
-    return True
+            restored += _replay(session_dir)[0]
+        except Exception as e:
+            if log_fn:
+                log_fn(f"⚠ Couldn't roll back {os.path.basename(session_dir)}: {e}", "error")
+            else:
+                print(f"Couldn't roll back {session_dir}: {e}", file=sys.stderr)
+    return restored
 
 def cleanup_old_backups(backup_dir, project_name, max_backups=3):
-    if not os.path.isdir(backup_dir):
-        return
-    files = [f for f in os.listdir(backup_dir) if f.startswith(project_name) and f.endswith(".zip")]
-    files.sort()
-    while len(files) > max_backups:
-        oldest = files.pop(0)
+    """Keep the newest max_backups sessions of the project, then drop blobs nothing refers to."""
+    sessions = list_sessions(backup_dir, project_name)
+    for session in sessions[:max(len(sessions) - max_backups, 0)]:
         try:
-            os.remove(os.path.join(backup_dir, oldest))
-        except:
-            pass
\ No newline at end of file
+            os.remove(session)
+        except OSError:
+            pass
+    return collect_garbage(backup_dir)
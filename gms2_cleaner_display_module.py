@@ -1,65 +1,209 @@
 import os
-from tkinter import *
+from bisect import bisect_left
+from tkinter import END
 from PIL import Image, ImageTk
 
-def populate_folder_list(listbox, sprite_data, layer_data=None):
-    listbox.delete(0, END)
-    for folder in sorted(sprite_data):
-        total_unused = len(sprite_data[folder]["sprites"])
-        if layer_data and folder in layer_data:
-            total_unused += len(layer_data[folder]["unused_folders"])
-        if total_unused == 0:
-            listbox.insert(END, f"{folder} (OK)")
+from gms2_cleaner_duplicate_module import has_duplicate_in_folder
+from gms2_cleaner_scan_module import fill_layer_pngs
+from gms2_cleaner_stats_module import STATS
+
+def folder_unused_count(folder, sprite_data, layer_data=None, mode=None):
+    total_unused = 0
+    if mode != "layers" and folder in sprite_data:
+        total_unused += len(sprite_data[folder]["sprites"])
+    if mode != "sprites" and layer_data and folder in layer_data:
+        total_unused += len(layer_data[folder]["unused_folders"])
+    return total_unused
+
+def folder_row_text(folder, total_unused, unreferenced=False):
+    suffix = " [unreferenced]" if unreferenced else ""
+    if total_unused == 0:
+        return f"{folder} (OK){suffix}"
+    return f"{folder} ({total_unused} unused){suffix}"
+
+class FolderList:
+    """The folder listbox plus the sorted folder names and counts behind its rows, so single rows
+    can be rewritten without losing the selection or scroll position."""
+
+    def __init__(self, listbox):
+        self.listbox = listbox
+        self.folders = []
+        self.counts = {}
+        self.unreferenced = set()
+
+    def clear(self):
+        self.listbox.delete(0, END)
+        self.folders = []
+        self.counts = {}
+        self.unreferenced = set()
+
+    def populate(self, sprite_data, layer_data=None, mode=None):
+        """List folders with their unused counts; mode "sprites" or "layers" counts only that view."""
+        selected = self.selected()
+        top = self.listbox.yview()[0]
+        folders = layer_data if mode == "layers" else sprite_data
+        self.folders = sorted(folders or {})
+        self.counts = {f: folder_unused_count(f, sprite_data, layer_data, mode) for f in self.folders}
+        self.unreferenced = set() if mode == "layers" else {
+            f for f in self.folders if sprite_data[f].get("references") == []}
+        with STATS.timer("display: fill folder list"):
+            self.listbox.delete(0, END)
+            if self.folders:
+                self.listbox.insert(END, *[folder_row_text(f, self.counts[f], f in self.unreferenced) for f in self.folders])
+        self.listbox.yview_moveto(top)
+        if selected is not None:
+            self.select(selected, see=False)
+
+    def set_row(self, folder, total_unused, force=False):
+        """Insert a folder's row, or rewrite it if its count changed."""
+        i = bisect_left(self.folders, folder)
+        selected = False
+        if i < len(self.folders) and self.folders[i] == folder:
+            if self.counts[folder] == total_unused and not force:
+                return
+            selected = self.listbox.selection_includes(i)
+            self.listbox.delete(i)
         else:
-            listbox.insert(END, f"{folder} ({total_unused} unused)")
+            self.folders.insert(i, folder)
+        self.counts[folder] = total_unused
+        self.listbox.insert(i, folder_row_text(folder, total_unused, folder in self.unreferenced))
+        if selected:
+            self.listbox.selection_set(i)
 
-def load_folder_contents(folder_name, frame, file_vars, sprite_data, layer_data, file_sizes, image_label, mode="sprites", search_term=""):
-    for widget in frame.winfo_children():
-        widget.destroy()
-    file_vars.clear()
+    def remove_row(self, folder):
+        i = self.index(folder)
+        if i is not None:
+            self.listbox.delete(i)
+            del self.folders[i]
+            del self.counts[folder]
 
-    def show_image(path):
-        try:
-            if os.path.isfile(path):
-                img = Image.open(path).resize((96, 96))
-                preview = ImageTk.PhotoImage(img)
-                image_label.configure(image=preview)
-                image_label.image = preview
+    def refresh(self, folders, sprite_data, layer_data=None, mode=None):
+        """Recount just these folders, e.g. the ones a delete touched."""
+        top = self.listbox.yview()[0]
+        for folder in folders:
+            if folder in self.counts:
+                self.set_row(folder, folder_unused_count(folder, sprite_data, layer_data, mode))
+        self.listbox.yview_moveto(top)
+
+    def mark_unreferenced(self, folders):
+        """Tag these rows once the reference pass is done; they were listed before it finished."""
+        top = self.listbox.yview()[0]
+        self.unreferenced = set(folders)
+        for folder in self.unreferenced:
+            if folder in self.counts:
+                self.set_row(folder, self.counts[folder], force=True)
+        self.listbox.yview_moveto(top)
+
+    def index(self, folder):
+        i = bisect_left(self.folders, folder)
+        if i < len(self.folders) and self.folders[i] == folder:
+            return i
+        return None
+
+    def folder_at(self, i):
+        return self.folders[i]
+
+    def selected(self):
+        sel = self.listbox.curselection()
+        return self.folders[sel[0]] if sel else None
+
+    def select(self, folder, see=True):
+        i = self.index(folder)
+        if i is None:
+            return
+        self.listbox.selection_clear(0, END)
+        self.listbox.selection_set(i)
+        if see:
+            self.listbox.see(i)
+
+def show_image(path, image_label, thumbnails=None):
+    try:
+        if os.path.isfile(path):
+            if thumbnails is not None:
+                img = thumbnails.get(path)
             else:
-                image_label.configure(text=f"Folder: {os.path.basename(path)}")
-        except:
-            image_label.configure(text="Error loading preview.")
+                img = Image.open(path).resize((96, 96))
+            preview = ImageTk.PhotoImage(img)
+            image_label.configure(image=preview)
+            image_label.image = preview
+        else:
+            image_label.configure(text=f"Folder: {os.path.basename(path)}")
+    except:
+        image_label.configure(text="Error loading preview.")
+
+def _sprite_row(name, path, size, duplicate_index, indent=0):
+    label = f"{name} ({size} B)"
+    checked = has_duplicate_in_folder(path, duplicate_index)  # Auto-check byte-identical copies
+    if checked:
+        label += " [duplicate]"
+    elif path in duplicate_index:
+        label += f" [same as {len(duplicate_index[path]) - 1} elsewhere]"
+    return label, path, indent, checked
 
+def _layer_folder_row(folder, folder_path, pngs, indent=0):
+    count = "" if pngs is None else f" ({len(pngs)} PNGs)"
+    return f"Folder: {folder}{count}", folder_path, indent, False
+
+def _show_rows(rows, checklist, thumbnails, previews):
+    """previews(row) tells which rows are PNGs worth loading a thumbnail for ahead of time."""
+    STATS.count("display: rows built", len(rows))
+    with STATS.timer("display: draw rows"):
+        checklist.set_rows(rows)
+    if thumbnails is not None:
+        thumbnails.prefetch([row[1] for row in rows if row[1] is not None and previews(row)])
+
+def load_folder_contents(folder_name, checklist, sprite_data, layer_data, duplicate_index, image_label, mode="sprites", search_term="", thumbnails=None):
+    rows = []
+    checklist.on_click = lambda p: show_image(p, image_label, thumbnails)
+    # Matched against "folder/name" like the search index, so a search for the folder shows all of it
     search_term = search_term.lower()
+    prefix = folder_name.lower() + "/"
 
     if mode == "sprites" and folder_name in sprite_data:
         folder_data = sprite_data[folder_name]
+        if folder_data.get("references") == []:
+            rows.append(("Nothing references this sprite (check for code that builds asset names).", None, 0, False))
         if folder_data["sprites"]:  # Check if there are unused sprites
             for name, path, size in folder_data["sprites"]:
-                if search_term in name.lower():
-                    var = IntVar()
-                    if len(file_sizes.get((folder_name, size), [])) > 1:
-                        var.set(1)  # Auto-check duplicates
-                    cb = Checkbutton(frame, text=f"{name} ({size} B)", variable=var, anchor="w",
-                                     command=lambda p=path: show_image(p))
-                    cb.pack(fill=X, anchor="w")
-                    file_vars.append((var, path))
+                if search_term in prefix + name.lower():
+                    rows.append(_sprite_row(name, path, size, duplicate_index))
         else:
-            Label(frame, text="No unused sprites found.", anchor="w").pack(fill=X, anchor="w")
+            rows.append(("No unused sprites found.", None, 0, False))
     elif mode == "layers" and folder_name in layer_data:
+        fill_layer_pngs(layer_data, [folder_name])  # Unless the background listing got there first
         for folder, folder_path, pngs in layer_data[folder_name]["unused_folders"]:
-            if search_term in folder.lower():
-                var = IntVar()
-                cb = Checkbutton(frame, text=f"Folder: {folder} ({len(pngs)} PNGs)", variable=var, anchor="w",
-                                 command=lambda p=folder_path: show_image(p))
-                cb.pack(fill=X, anchor="w")
-                file_vars.append((var, folder_path))
+            if search_term in prefix + folder.lower():
+                rows.append(_layer_folder_row(folder, folder_path, pngs))
                 for name, path, size in pngs:
-                    if search_term in name.lower():
-                        var = IntVar()
-                        cb = Checkbutton(frame, text=f"  {name} ({size} B)", variable=var, anchor="w",
-                                         command=lambda p=path: show_image(p))
-                        cb.pack(fill=X, anchor="w")
-                        file_vars.append((var, path))
+                    if search_term in f"{prefix}{folder.lower()}/{name.lower()}":
+                        rows.append((f"{name} ({size} B)", path, 1, False))
         if not layer_data[folder_name]["unused_folders"]:
-            Label(frame, text="No unused layer folders found.", anchor="w").pack(fill=X, anchor="w")
\ No newline at end of file
+            rows.append(("No unused layer folders found.", None, 0, False))
+    _show_rows(rows, checklist, thumbnails, lambda row: mode == "sprites" or row[2])
+
+def load_search_results(search_term, search_index, checklist, sprite_data, layer_data, duplicate_index, image_label, mode="sprites", thumbnails=None):
+    """Show every flagged entry of the current view matching search_term, from all folders, under
+    a label row per folder."""
+    checklist.on_click = lambda p: show_image(p, image_label, thumbnails)
+    with STATS.timer("search: query"):
+        matches = search_index.search(search_term, mode)
+    STATS.count("search: matches", len(matches))
+    rows = []
+    current = None
+    for folder, path in matches:
+        if folder != current:
+            current = folder
+            rows.append((folder, None, 0, False))
+            # Entries are found by path; name and size come from the folder's own list
+            if mode == "sprites":
+                entries = {p: (name, size) for name, p, size in sprite_data[folder]["sprites"]}
+            else:
+                entries = {p: (name, pngs) for name, p, pngs in layer_data[folder]["unused_folders"]}
+        name, detail = entries[path]
+        if mode == "sprites":
+            rows.append(_sprite_row(name, path, detail, duplicate_index, indent=1))
+        else:
+            rows.append(_layer_folder_row(name, path, detail, indent=1))
+    if not rows:
+        rows.append((f"Nothing flagged matches \"{search_term}\".", None, 0, False))
+    _show_rows(rows, checklist, thumbnails, lambda row: mode == "sprites")
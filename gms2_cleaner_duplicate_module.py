@@ -0,0 +1,85 @@
+import os
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+PARTIAL_HASH_BYTES = 4096
+CHUNK_SIZE = 1024 * 1024
+# Files handed to the pool at a time; Executor.map makes every future up front
+BATCH = 1024
+
+def _partial_hash(path, size):
+    """Hash the first and last PARTIAL_HASH_BYTES; small files are hashed whole."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        if size <= PARTIAL_HASH_BYTES * 2:
+            h.update(f.read())
+        else:
+            h.update(f.read(PARTIAL_HASH_BYTES))
+            f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+            h.update(f.read(PARTIAL_HASH_BYTES))
+    return h.digest()
+
+def _full_hash(path):
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.digest()
+
+def _safe(fn, *args):
+    try:
+        return fn(*args)
+    except OSError:
+        return None
+
+def _refine(groups, key_fn, map_fn):
+    """Split each group of (path, size) by key_fn, keeping only keys shared by 2+ files. map_fn is
+    the pool's map, or the builtin one to hash on this thread."""
+    candidates = [(i, item) for i, group in enumerate(groups) for item in group]
+    buckets = defaultdict(list)
+    for start in range(0, len(candidates), BATCH):
+        batch = candidates[start:start + BATCH]
+        for (i, item), key in zip(batch, map_fn(lambda c: _safe(key_fn, *c[1]), batch)):
+            if key is not None:
+                buckets[(i, key)].append(item)
+    return [group for group in buckets.values() if len(group) > 1]
+
+def find_duplicate_groups(files, max_workers=None):
+    """Group byte-identical files from an iterable of (path, size).
+
+    Stage 1 groups by size, stage 2 by a hash of the head and tail, stage 3 by a
+    streamed full hash. Each stage only looks at files still sharing a group.
+    """
+    by_size = defaultdict(list)
+    for path, size in files:
+        by_size[size].append((path, size))
+    groups = [group for group in by_size.values() if len(group) > 1]
+    if not groups:
+        return []
+
+    if max_workers == 1:
+        return _find_in_groups(groups, map)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return _find_in_groups(groups, executor.map)
+
+def _find_in_groups(groups, map_fn):
+    groups = _refine(groups, _partial_hash, map_fn)
+    small = [g for g in groups if g[0][1] <= PARTIAL_HASH_BYTES * 2]
+    large = [g for g in groups if g[0][1] > PARTIAL_HASH_BYTES * 2]
+    large = _refine(large, lambda path, size: _full_hash(path), map_fn)
+    return [[path for path, _ in group] for group in small + large]
+
+def build_duplicate_index(file_sizes, max_workers=None):
+    """Map every PNG path with a byte-identical copy anywhere in the project to its group."""
+    files = [(path, size) for (_, size), entries in file_sizes.items() for _, path in entries]
+    index = {}
+    for group in find_duplicate_groups(files, max_workers):
+        group = tuple(group)
+        for path in group:
+            index[path] = group
+    return index
+
+def has_duplicate_in_folder(path, duplicate_index):
+    folder = os.path.dirname(path)
+    return any(p != path and os.path.dirname(p) == folder for p in duplicate_index.get(path, ()))
@@ -0,0 +1,48 @@
+import os
+import time
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+def try_lock(path):
+    """Open path and take an exclusive lock on it without waiting. Returns the open file (pass it
+    to unlock), or None if another process or file handle holds the lock. The lock goes away with
+    the process, so a crash never leaves it held."""
+    f = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+def lock(path, poll=0.05):
+    """try_lock, waiting for as long as someone else holds it."""
+    while True:
+        f = try_lock(path)
+        if f is not None:
+            return f
+        time.sleep(poll)
+
+def unlock(f, remove=False):
+    """Release a lock from try_lock or lock; remove also deletes the lock file."""
+    if fcntl is None:
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+    f.close()
+    if remove:
+        try:
+            os.remove(f.name)
+        except OSError:
+            pass
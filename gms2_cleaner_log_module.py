@@ -1,11 +1,32 @@
+import shutil
+import tempfile
 import tkinter as tk
+from collections import deque
 from tkinter import filedialog
 
+from gms2_cleaner_stats_module import STATS
+
+LEVELS = {"debug": 10, "info": 20, "success": 20, "warn": 30, "error": 40}
+
 class LogPanel:
-    def __init__(self, parent):
+    def __init__(self, parent, max_lines=5000, flush_ms=100, min_level="info"):
         self.log_frame = tk.Frame(parent)
         self.log_visible = False
-        self.log_lines = []
+        # Newest lines for export; older ones spill to a temp file instead of growing this buffer
+        self.log_lines = deque(maxlen=max_lines)
+        self.spill_file = None
+        self.pending = []
+        self.flush_ms = flush_ms
+        self.flush_scheduled = False
+        self.max_widget_lines = max_lines
+        self.min_level = LEVELS[min_level]
+
+        toolbar = tk.Frame(self.log_frame)
+        toolbar.pack(side="top", fill="x")
+        self.level_var = tk.StringVar(value=min_level)
+        tk.OptionMenu(toolbar, self.level_var, "debug", "info", "warn", "error",
+                      command=self.set_min_level).pack(side="left")
+        tk.Button(toolbar, text="Export Log", command=self.export).pack(side="left")
 
         self.log_box = tk.Text(self.log_frame, height=10, wrap="word", state="disabled")
         self.log_scroll = tk.Scrollbar(self.log_frame, command=self.log_box.yview)
@@ -13,6 +34,7 @@ class LogPanel:
         self.log_scroll.pack(side="right", fill="y")
         self.log_box.pack(side="left", fill="both", expand=True)
 
+        self.log_box.tag_config("debug", foreground="gray")
         self.log_box.tag_config("info", foreground="white")
         self.log_box.tag_config("success", foreground="green")
         self.log_box.tag_config("warn", foreground="orange")
@@ -32,18 +54,65 @@ class LogPanel:
             self.log_frame.pack(fill="both", expand=True, padx=5, pady=5)
         self.log_visible = not self.log_visible
 
-    def log(self, message, level="info"):
-        self.log_box.configure(state="normal")
-        self.log_box.insert("end", message + "\n", level)
-        self.log_box.configure(state="disabled")
-        self.log_box.see("end")
+    def set_min_level(self, level):
+        self.min_level = LEVELS[level]
+
+    def enabled(self, level):
+        return LEVELS.get(level, 20) >= self.min_level
+
+    def log(self, message, level="info", *args):
+        """Queue a line for the panel; args are %-formatted into message only if the level is shown."""
+        if LEVELS.get(level, 20) < self.min_level:
+            return
+        if args:
+            message = message % args
+        if len(self.log_lines) == self.log_lines.maxlen:
+            self._spill(self.log_lines[0])
+        STATS.count("log lines")
         self.log_lines.append(f"[{level.upper()}] {message}")
+        self.pending.append((message, level))
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.log_box.after(self.flush_ms, self.flush)
+
+    def flush(self):
+        self.flush_scheduled = False
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        with STATS.timer("log: widget inserts"):
+            self.log_box.configure(state="normal")
+            # One insert per run of same-level lines
+            start = 0
+            for i in range(1, len(pending) + 1):
+                if i == len(pending) or pending[i][1] != pending[start][1]:
+                    self.log_box.insert("end", "".join(m + "\n" for m, _ in pending[start:i]), pending[start][1])
+                    start = i
+            excess = int(self.log_box.index("end-1c").split(".")[0]) - 1 - self.max_widget_lines
+            if excess > 0:
+                self.log_box.delete("1.0", f"{excess + 1}.0")
+            self.log_box.configure(state="disabled")
+            self.log_box.see("end")
+
+    def _spill(self, line):
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.spill_file.write(line + "\n")
 
     def export(self):
         path = filedialog.asksaveasfilename(defaultextension=".txt",
                                              filetypes=[("Text Files", "*.txt")],
                                              title="Export Log")
         if path:
-            with open(path, "w") as f:
+            with open(path, "w", encoding="utf-8") as f:
+                if self.spill_file is not None:
+                    self.spill_file.flush()
+                    self.spill_file.seek(0)
+                    shutil.copyfileobj(self.spill_file, f)
+                    self.spill_file.seek(0, 2)
                 for line in self.log_lines:
-                    f.write(line + "\n")
\ No newline at end of file
+                    f.write(line + "\n")
+                report = STATS.report()
+                if report:
+                    f.write("\nTimings and counters:\n")
+                    f.writelines(line + "\n" for line in report)
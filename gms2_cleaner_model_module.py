@@ -0,0 +1,127 @@
+import os
+import sys
+from array import array
+from collections.abc import Mapping
+
+class PngList:
+    """(name, path, size) records for PNGs under one folder, read like a list of tuples.
+
+    The folder path is stored once, each file as its path relative to it (just the interned file
+    name for a sprite's own frames, so it is the same string object as in the frame-name sets) and
+    the sizes in an array. Full paths are only joined when an entry is read."""
+
+    __slots__ = ("base", "rels", "sizes")
+
+    def __init__(self, base, rels=(), sizes=()):
+        self.base = base
+        self.rels = tuple(rels)
+        self.sizes = array("q", sizes)
+
+    @classmethod
+    def from_entries(cls, base, entries):
+        """Build from (name, path, size) tuples whose paths are under base."""
+        rels = []
+        sizes = []
+        for name, path, size in entries:
+            rel = os.path.relpath(path, base)
+            rels.append(sys.intern(name) if rel == name else rel)
+            sizes.append(size)
+        return cls(base, rels, sizes)
+
+    def _entry(self, rel, size):
+        return os.path.basename(rel), os.path.join(self.base, rel), size
+
+    def __len__(self):
+        return len(self.rels)
+
+    def __iter__(self):
+        for rel, size in zip(self.rels, self.sizes):
+            yield self._entry(rel, size)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._entry(rel, size) for rel, size in zip(self.rels[i], self.sizes[i])]
+        return self._entry(self.rels[i], self.sizes[i])
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PngList({self.base!r}, {len(self)} files)"
+
+    def _select(self, keep):
+        rels = []
+        sizes = []
+        for rel, size in zip(self.rels, self.sizes):
+            if keep(rel):
+                rels.append(rel)
+                sizes.append(size)
+        return PngList(self.base, rels, sizes)
+
+    def without_names(self, names):
+        """The entries whose file name is not in names (frame names the .yy uses, say)."""
+        return self._select(lambda rel: os.path.basename(rel) not in names)
+
+    def without_paths(self, paths):
+        return self._select(lambda rel: os.path.join(self.base, rel) not in paths)
+
+class FileSizes(Mapping):
+    """The scan's file_sizes: {(folder, size): [(name, path), ...]} over every sprite's root PNGs.
+
+    Only the PngList of each folder is kept; the groups are built while they are read, which is
+    once per scan (duplicate detection). Mapping fills in the rest of the dict reads (get)."""
+
+    __slots__ = ("folders",)
+
+    def __init__(self):
+        self.folders = {}
+
+    def add(self, folder, pngs):
+        self.folders[folder] = pngs
+
+    def remove_folder(self, folder):
+        """Forget a folder's PNGs; returns their PngList, or None."""
+        return self.folders.pop(folder, None)
+
+    def items(self):
+        for folder, pngs in self.folders.items():
+            groups = {}
+            for name, path, size in pngs:
+                groups.setdefault(size, []).append((name, path))
+            for size, group in groups.items():
+                yield (folder, size), group
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def values(self):
+        return (group for _, group in self.items())
+
+    __iter__ = keys
+
+    def __len__(self):
+        return sum(len(set(pngs.sizes)) for pngs in self.folders.values())
+
+    def __getitem__(self, key):
+        folder, size = key
+        group = [(name, path) for name, path, s in self.folders.get(folder, ()) if s == size]
+        if not group:
+            raise KeyError(key)
+        return group
+
+    def __contains__(self, key):
+        folder, size = key
+        return folder in self.folders and size in self.folders[folder].sizes
+
+    def __eq__(self, other):
+        try:
+            return dict(self.items()) == dict(other.items())
+        except AttributeError:
+            return NotImplemented
+
+    __hash__ = None
@@ -0,0 +1,54 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Resource folders whose .yy/.gml files can name a sprite. sprites/ is left out (each sprite's
+# .yy names itself) and so is the .yyp, which lists every sprite as a resource.
+REFERENCE_DIRS = ("objects", "rooms", "sequences", "scripts", "tilesets", "timelines", "particles", "extensions")
+SOURCE_EXTENSIONS = (".yy", ".gml")
+# GameMaker asset names are identifiers, so every reference is a whole identifier token
+_IDENTIFIER = re.compile(rb"[A-Za-z_][A-Za-z0-9_]*")
+
+def iter_source_files(project_dir):
+    for top in REFERENCE_DIRS:
+        for root, _, files in os.walk(os.path.join(project_dir, top)):
+            for file in files:
+                if file.lower().endswith(SOURCE_EXTENSIONS):
+                    yield os.path.join(root, file)
+
+def _file_references(path, names):
+    try:
+        with open(path, "rb") as f:
+            return path, names.intersection(_IDENTIFIER.findall(f.read()))
+    except OSError:
+        return path, set()
+
+def build_reference_index(project_dir, sprite_names, max_workers=None, cancel_event=None):
+    """Return {sprite name: [files that mention it]} for the sprites something refers to.
+
+    Each file is read once and split into identifiers, which are looked up in a set of all the
+    sprite names, so the cost grows with total source size and not with the number of sprites.
+    Returns None if cancel_event is set first; a partial index would make sprites look unused."""
+    names = {name.encode("utf-8") for name in sprite_names}
+    index = {}
+    executor = None if max_workers == 1 else ThreadPoolExecutor(max_workers=max_workers)
+    map_fn = map if executor is None else executor.map
+    try:
+        for path, found in map_fn(lambda p: _file_references(p, names), iter_source_files(project_dir)):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            rel_path = os.path.relpath(path, project_dir)
+            for name in found:
+                index.setdefault(name.decode("utf-8"), []).append(rel_path)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return index
+
+def annotate_references(sprite_data, index):
+    """Store each sprite's referencing files under "references"; an empty list means unreferenced."""
+    for folder in sprite_data:
+        sprite_data[folder]["references"] = index.get(folder, [])
+
+def unreferenced_sprites(sprite_data):
+    return sorted(f for f in sprite_data if sprite_data[f].get("references") == [])
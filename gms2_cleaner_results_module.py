@@ -0,0 +1,103 @@
+import os
+from collections import defaultdict
+
+from gms2_cleaner_search_module import SearchIndex
+
+class ResultIndex:
+    """Maps every flagged path to the sprite folder holding it, so a delete only rebuilds the
+    folders it touched instead of searching all of sprite_data and layer_data per path. Also keeps
+    the search index over the same paths."""
+
+    def __init__(self):
+        self.sprites = {}        # unused root PNG -> sprite folder
+        self.layer_folders = {}  # unused layer folder -> sprite folder
+        self.search = SearchIndex()
+
+    def add_item(self, item):
+        """Index one result dict from iter_scan_project."""
+        folder = item["folder"]
+        for name, path, _ in item["sprites"] or ():
+            self.sprites[path] = folder
+            self.search.add(path, folder, name, "sprites")
+        for subfolder, folder_path, _ in item["unused_folders"] or ():
+            self.layer_folders[folder_path] = folder
+            self.search.add(folder_path, folder, subfolder, "layers")
+
+    def remove_paths(self, paths, sprite_data, layer_data, duplicate_index=None):
+        """Drop deleted paths from the scan results in place. Returns the set of folders that changed."""
+        sprite_hits = defaultdict(set)
+        layer_hits = defaultdict(set)
+        for path in paths:
+            self.search.remove(path)
+            folder = self.sprites.pop(path, None)
+            if folder is not None:
+                sprite_hits[folder].add(path)
+            folder = self.layer_folders.pop(path, None)
+            if folder is not None:
+                layer_hits[folder].add(path)
+                continue
+            # A PNG inside an unused layer folder; those are listed lazily, so go by its parents
+            owner = self._layer_folder_of(path)
+            if owner is not None:
+                layer_hits[self.layer_folders[owner]].add(path)
+
+        for folder, gone in sprite_hits.items():
+            sprite_data[folder]["sprites"] = sprite_data[folder]["sprites"].without_paths(gone)
+        for folder, gone in layer_hits.items():
+            kept = []
+            for subfolder, folder_path, pngs in layer_data[folder]["unused_folders"]:
+                if folder_path in gone:
+                    continue
+                if pngs is not None and any(path in gone for _, path, _ in pngs):
+                    pngs = pngs.without_paths(gone)
+                    if not pngs:
+                        # Emptied out; the delete removes the folder itself too
+                        self.layer_folders.pop(folder_path, None)
+                        self.search.remove(folder_path)
+                        continue
+                kept.append((subfolder, folder_path, pngs))
+            layer_data[folder]["unused_folders"] = kept
+
+        _drop_duplicates(paths, duplicate_index)
+        return set(sprite_hits) | set(layer_hits)
+
+    def drop_folder(self, folder, sprite_data, file_sizes, layer_data, duplicate_index=None):
+        """Forget everything a scan found in one folder, before it is scanned again (or because it
+        is gone). Returns the old sprite_data entry, or None."""
+        sprite_entry = sprite_data.pop(folder, None)
+        layer_entry = layer_data.pop(folder, None)
+        if sprite_entry is not None:
+            for _, path, _ in sprite_entry["sprites"]:
+                self.sprites.pop(path, None)
+                self.search.remove(path)
+        if layer_entry is not None:
+            for _, folder_path, _ in layer_entry["unused_folders"]:
+                self.layer_folders.pop(folder_path, None)
+                self.search.remove(folder_path)
+        pngs = file_sizes.remove_folder(folder)
+        if pngs is not None:
+            _drop_duplicates([path for _, path, _ in pngs], duplicate_index)
+        return sprite_entry
+
+    def _layer_folder_of(self, path):
+        parent = os.path.dirname(path)
+        while parent not in self.layer_folders:
+            up = os.path.dirname(parent)
+            if up == parent:
+                return None
+            parent = up
+        return parent
+
+def _drop_duplicates(paths, duplicate_index):
+    if not duplicate_index:
+        return
+    for path in paths:
+        group = duplicate_index.pop(path, None)
+        if group is None:
+            continue
+        rest = tuple(p for p in group if p != path)
+        for p in rest:
+            if len(rest) > 1:
+                duplicate_index[p] = rest
+            else:
+                duplicate_index.pop(p, None)
@@ -1,160 +1,323 @@
 import os
-import json
+import sys
 import glob
-import re
+import inspect
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-def fix_json_trailing_commas(json_str):
-    """Remove trailing commas from JSON string to make it valid."""
-    json_str = re.sub(r',\s*([\]}])', r'\1', json_str)
-    json_str = re.sub(r',\s*(\n\s*[\]}])', r'\1', json_str)
-    return json_str
+from gms2_cleaner_cache_module import ScanCache, folder_fingerprint
+from gms2_cleaner_yy_module import read_frame_names, read_sprite_folders
+from gms2_cleaner_refs_module import build_reference_index, annotate_references
+from gms2_cleaner_stats_module import STATS
+from gms2_cleaner_model_module import PngList, FileSizes
 
-def scan_gms2_project(project_dir, log_fn=None, progress_callback=None):
-    sprites_dir = os.path.join(project_dir, "sprites")
-    sprite_data = defaultdict(lambda: {"sprites": [], "used": set()})
-    file_sizes = defaultdict(list)
-    used_frames_global = set()
+class ScanCancelled(Exception):
+    pass
 
-    if not os.path.isdir(sprites_dir):
-        raise FileNotFoundError("sprites folder not found in project.")
+class _Joined:
+    """Join names only if a log line is actually shown."""
+    def __init__(self, names):
+        self.names = names
+
+    def __str__(self):
+        return ", ".join(self.names)
+
+def lazy_log(log_fn):
+    """log_fn as a (message, level, *args) callable, the form the scan logs with so lines a filter
+    drops are never formatted. Callbacks that take *args are used as they are; a plain
+    (message, level) callback gets the message formatted first."""
+    if log_fn is None:
+        return None
+    try:
+        parameters = inspect.signature(log_fn).parameters.values()
+    except (TypeError, ValueError):
+        parameters = ()
+    if any(p.kind == p.VAR_POSITIONAL for p in parameters):
+        return log_fn
+
+    def log(message, level="info", *args):
+        log_fn(message % args if args else message, level)
+    return log
+
+def _read_sprite_folder(folder, folder_path, cache=None):
+    """Return (frame names, root PNGs as a PngList, fingerprint, cache hit) for a sprite folder."""
+    yy_path = os.path.join(folder_path, f"{folder}.yy")
+    fingerprint = names = None
+    if cache is not None:
+        fingerprint = folder_fingerprint(folder_path, yy_path)
+        names = cache.get(folder, fingerprint)
+    hit = names is not None
+    if hit:
+        STATS.count("cache hits")
+        names = set(names)
+    else:
+        with STATS.timer("read .yy"):
+            with open(yy_path, "r", encoding="utf-8") as f:
+                text = f.read()
+        STATS.count(".yy parsed")
+        STATS.count("bytes read", len(text))
+        with STATS.timer("parse .yy"):
+            names = read_frame_names(text)
+
+    # Scan only root folder, ignore layers; sizes are read fresh even on a cache hit
+    files = []
+    sizes = []
+    with STATS.timer("list sprite folders"):
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(".png") and entry.is_file():
+                    files.append(sys.intern(entry.name))
+                    sizes.append(entry.stat().st_size)
+    STATS.count("files stat'ed", len(files))
+    return names, PngList(folder_path, files, sizes), fingerprint, hit
+
+def _cache_result(cache, folder, names, fingerprint, hit):
+    if cache is not None and not hit:
+        cache.put(folder, fingerprint, names)
+
+def _scan_layer_subfolders(folder_path, used_names, root_pngs):
+    """Classify each layers/<subfolder>; returns (subfolder, path, reason), reason None if unused.
+    Unused folders' PNGs are listed later by list_layer_pngs, only when someone needs them."""
+    entries = []
+    STATS.count("layer folders listed")
+    try:
+        scan = os.scandir(os.path.join(folder_path, "layers"))
+    except (FileNotFoundError, NotADirectoryError):
+        return entries
+    with scan:
+        for entry in scan:
+            if not entry.is_dir():
+                continue
+            subfolder = entry.name
+            if f"{subfolder}.png" in root_pngs:
+                entries.append((subfolder, entry.path, "root"))
+            elif subfolder in used_names:
+                entries.append((subfolder, entry.path, "yy"))
+            else:
+                entries.append((subfolder, entry.path, None))
+    return entries
+
+def list_layer_pngs(folder_path):
+    """Every PNG under a layer folder, as a PngList."""
+    rels = []
+    sizes = []
+    pending = [(folder_path, "")]
+    while pending:
+        path, prefix = pending.pop()
+        try:
+            scan = os.scandir(path)
+        except OSError:
+            continue
+        with scan:
+            for entry in scan:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((entry.path, prefix + entry.name + os.sep))
+                elif entry.name.lower().endswith(".png"):
+                    rels.append(prefix + entry.name)
+                    sizes.append(entry.stat().st_size)
+    STATS.count("files stat'ed", len(rels))
+    return PngList(folder_path, rels, sizes)
+
+def unlisted_layer_folders(layer_data):
+    """(sprite folder, layer folder path) for every unused layer folder whose PNGs aren't listed yet."""
+    return [(folder, folder_path) for folder in layer_data
+            for _, folder_path, pngs in layer_data[folder]["unused_folders"] if pngs is None]
+
+def set_layer_pngs(layer_data, folder, folder_path, pngs):
+    """Store a listing made elsewhere; False if the layer folder is gone or already listed."""
+    if folder not in layer_data:
+        return False
+    entries = layer_data[folder]["unused_folders"]
+    for i, (subfolder, path, old) in enumerate(entries):
+        if path == folder_path and old is None:
+            entries[i] = (subfolder, path, pngs)
+            return True
+    return False
+
+def fill_layer_pngs(layer_data, folders=None):
+    """List PNGs now for unlisted layer folders, of every sprite folder or just the given ones."""
+    for folder in (list(layer_data) if folders is None else folders):
+        if folder not in layer_data:
+            continue
+        entries = layer_data[folder]["unused_folders"]
+        for i, (subfolder, path, pngs) in enumerate(entries):
+            if pngs is None:
+                entries[i] = (subfolder, path, list_layer_pngs(path))
+
+def _scan_folder(folder, folder_path, cache=None, layers=True):
+    yy_path = os.path.join(folder_path, f"{folder}.yy")
+    try:
+        names, pngs, fingerprint, hit = _read_sprite_folder(folder, folder_path, cache)
+        layer_entries = []
+        if layers:
+            layer_entries = _scan_layer_subfolders(folder_path, names, set(pngs.rels))
+        return folder, yy_path, (names, pngs, fingerprint, hit), layer_entries, None
+    except Exception as e:
+        return folder, yy_path, None, [], e
+
+def _map_folders(fn, folders, max_workers):
+    """Run fn over folders on a thread pool, yielding results in input order."""
+    if max_workers == 1 or len(folders) < 2:
+        for args in folders:
+            yield fn(*args)
+        return
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for result in executor.map(lambda args: fn(*args), folders):
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
+def read_yyp_sprite_folders(project_dir, log_fn=None):
+    """Sprite folders the .yyp lists; an empty set means every folder is treated as a sprite."""
+    log_fn = lazy_log(log_fn)
     yyp_files = glob.glob(os.path.join(project_dir, "*.yyp"))
     sprite_folders = set()
     if yyp_files:
         yyp_path = yyp_files[0]
         try:
-            with open(yyp_path, "r", encoding="utf-8") as f:
-                yyp_content = f.read()
-                for line in yyp_content.splitlines():
-                    if '"path": "sprites/' in line:
-                        folder = line.split('"path": "sprites/')[1].split('/')[0]
-                        sprite_folders.add(folder)
+            with STATS.timer("read .yyp"):
+                with open(yyp_path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                sprite_folders = read_sprite_folders(text)
+            STATS.count("bytes read", len(text))
             if log_fn:
-                log_fn(f"Found sprite folders in {yyp_path}: {', '.join(sprite_folders)}", "info")
+                log_fn("Found sprite folders in %s: %s", "debug", yyp_path, _Joined(sprite_folders))
         except Exception as e:
+            STATS.count("parse failures")
             if log_fn:
                 log_fn(f"⚠ Error reading {yyp_path}: {e}", "error")
+    return sprite_folders
 
-    folders = [f for f in os.listdir(sprites_dir) if os.path.isdir(os.path.join(sprites_dir, f)) and (not sprite_folders or f in sprite_folders)]
-    total_folders = len(folders)
-    for i, folder in enumerate(folders):
-        if progress_callback:
-            progress_callback((i + 1) / total_folders * 100)
-        folder_path = os.path.join(sprites_dir, folder)
-        yy_path = os.path.join(folder_path, f"{folder}.yy")
-        used_pngs = set()
+def new_scan_results():
+    """Return empty (sprite_data, file_sizes, used_frames_global, layer_data) containers."""
+    return (defaultdict(lambda: {"sprites": [], "used": set()}), FileSizes(), set(),
+            defaultdict(lambda: {"unused_folders": [], "used_pngs": set()}))
 
-        if log_fn:
-            log_fn(f"Scanning {yy_path}...")
+def add_scan_item(item, sprite_data, file_sizes, used_frames_global, layer_data):
+    """Merge one result from iter_scan_project into the scan result containers."""
+    folder = item["folder"]
+    if item["sprites"] is not None:
+        used_frames_global.update(item["used_pngs"])
+        sprite_data[folder]["used"] = item["used_pngs"]
+        sprite_data[folder]["sprites"] = item["sprites"]
+        file_sizes.add(folder, item["pngs"])
+    if item["unused_folders"] is not None:
+        layer_data[folder]["used_pngs"] = item["used_pngs"]
+        layer_data[folder]["unused_folders"] = item["unused_folders"]
 
-        try:
-            with open(yy_path, "r", encoding="utf-8") as f:
-                yy_content = f.read()
-                yy_content = fix_json_trailing_commas(yy_content)
-                yy_data = json.loads(yy_content)
-                for frame in yy_data.get("frames", []):
-                    for key in ("name", "%Name"):
-                        if key in frame and isinstance(frame[key], str):
-                            png_name = f"{frame[key]}.png"
-                            used_pngs.add(png_name)
-                            used_frames_global.add(png_name)
-                if log_fn and used_pngs:
-                    log_fn(f"Found names in {folder}: {', '.join([n[:-4] for n in used_pngs])}", "info")
-        except Exception as e:
-            if log_fn:
-                log_fn(f"⚠ Failed to read {yy_path}: {e}", "error")
-            continue
+def iter_scan_project(project_dir, log_fn=None, progress_callback=None, max_workers=None, use_cache=False,
+                      sprites=True, layers=True, cancel_event=None, folders=None):
+    """Read every sprite folder once and yield one result dict per folder, in folder order.
 
-        sprite_data[folder]["used"] = used_pngs
-
-        # Scan only root folder, ignore layers
-        for file in os.listdir(folder_path):
-            path = os.path.join(folder_path, file)
-            if file.lower().endswith(".png") and os.path.isfile(path):
-                size = os.path.getsize(path)
-                file_sizes[(folder, size)].append((file, path))
-                if file not in used_pngs:
-                    sprite_data[folder]["sprites"].append((file, path, size))
-
-    if progress_callback:
-        progress_callback(100)
-    return sprite_data, file_sizes, used_frames_global
-
-def scan_layers(project_dir, log_fn=None, progress_callback=None):
+    Each dict holds "folder", "pngs" (root PNGs), "used_pngs", "sprites" (unused root PNGs, or
+    None if the folder is not a .yyp sprite) and "unused_folders" (None unless layers is set).
+    Unused layer folders come as (subfolder, path, None); fill_layer_pngs lists their PNGs.
+    With folders, only those sprite folders are scanned (ones no longer on disk are skipped).
+    Raises ScanCancelled once cancel_event is set.
+    """
+    log_fn = lazy_log(log_fn)
     sprites_dir = os.path.join(project_dir, "sprites")
-    layer_data = defaultdict(lambda: {"unused_folders": [], "used_pngs": set()})
-
     if not os.path.isdir(sprites_dir):
         raise FileNotFoundError("sprites folder not found in project.")
 
-    folders = [f for f in os.listdir(sprites_dir) if os.path.isdir(os.path.join(sprites_dir, f))]
-    total_folders = len(folders)
-    for i, folder in enumerate(folders):
-        if progress_callback:
-            progress_callback((i + 1) / total_folders * 100)
-        folder_path = os.path.join(sprites_dir, folder)
-        yy_path = os.path.join(folder_path, f"{folder}.yy")
-        used_pngs = set()
-        used_names = set()
+    sprite_folders = read_yyp_sprite_folders(project_dir, log_fn) if sprites else set()
 
-        if log_fn:
-            log_fn(f"Scanning layers for {yy_path}...")
+    all_folders = None
+    if folders is None:
+        with STATS.timer("list sprites/"):
+            all_folders = folders = [sys.intern(f) for f in os.listdir(sprites_dir) if os.path.isdir(os.path.join(sprites_dir, f))]
+    else:
+        folders = [f for f in sorted(folders) if os.path.isdir(os.path.join(sprites_dir, f))]
+    if not layers:
+        folders = [f for f in folders if not sprite_folders or f in sprite_folders]
+    total_folders = len(folders)
+    cache = ScanCache(project_dir) if use_cache else None
+    jobs = [(folder, os.path.join(sprites_dir, folder), cache, layers) for folder in folders]
+    results = _map_folders(_scan_folder, jobs, max_workers)
+    try:
+        for i, (folder, yy_path, read_result, layer_entries, error) in enumerate(results):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ScanCancelled("Scan cancelled.")
+            if progress_callback:
+                progress_callback((i + 1) / total_folders * 100)
 
-        try:
-            with open(yy_path, "r", encoding="utf-8") as f:
-                yy_content = f.read()
-                yy_content = fix_json_trailing_commas(yy_content)
-                yy_data = json.loads(yy_content)
-                for frame in yy_data.get("frames", []):
-                    for key in ("name", "%Name"):
-                        if key in frame and isinstance(frame[key], str):
-                            used_names.add(frame[key])
-                            used_pngs.add(f"{frame[key]}.png")
-                if log_fn and used_names:
-                    log_fn(f"Found names in {folder}: {', '.join(used_names)}", "info")
-        except Exception as e:
             if log_fn:
-                log_fn(f"⚠ Error reading {yy_path}: {e}", "error")
-            continue
+                log_fn("Scanning %s...", "debug", yy_path)
 
-        layer_data[folder]["used_pngs"] = used_pngs
-
-        # Collect root PNGs
-        root_pngs = set()
-        for file in os.listdir(folder_path):
-            if file.lower().endswith(".png") and os.path.isfile(os.path.join(folder_path, file)):
-                root_pngs.add(file)
-
-        layers_path = os.path.join(folder_path, "layers")
-        if os.path.isdir(layers_path):
-            for subfolder in os.listdir(layers_path):
-                subfolder_path = os.path.join(layers_path, subfolder)
-                if os.path.isdir(subfolder_path):
-                    has_matching_png = False
-                    if f"{subfolder}.png" in root_pngs:
-                        has_matching_png = True
-                        if log_fn:
-                            log_fn(f"Subfolder {subfolder} matches root PNG in {folder}", "info")
-                    elif subfolder in used_names:
-                        has_matching_png = True
-                        if log_fn:
-                            log_fn(f"Subfolder {subfolder} matches name in {folder}.yy", "info")
-                    if not has_matching_png:
-                        png_files = []
-                        for root, _, files in os.walk(subfolder_path):
-                            for file in files:
-                                if file.lower().endswith(".png"):
-                                    path = os.path.join(root, file)
-                                    size = os.path.getsize(path)
-                                    png_files.append((file, path, size))
-                        layer_data[folder]["unused_folders"].append((subfolder, subfolder_path, png_files))
-                        if log_fn:
-                            log_fn(f"Found unused layer folder: {subfolder} in {folder}", "info")
-                    else:
+            if error is not None:
+                STATS.count("parse failures")
+                if log_fn:
+                    log_fn(f"⚠ Failed to read {yy_path}: {error}", "error")
+                continue
+
+            names, pngs, fingerprint, hit = read_result
+            _cache_result(cache, folder, names, fingerprint, hit)
+            # Interned, so these are the same strings as the PngList's file names
+            used_pngs = {sys.intern(f"{name}.png") for name in names}
+            if log_fn and names:
+                log_fn("Found names in %s: %s", "debug", folder, _Joined(names))
+            item = {"folder": folder, "pngs": pngs, "used_pngs": used_pngs, "sprites": None, "unused_folders": None}
+
+            if sprites and (not sprite_folders or folder in sprite_folders):
+                item["sprites"] = pngs.without_names(used_pngs)
+
+            if layers:
+                item["unused_folders"] = []
+                for subfolder, subfolder_path, reason in layer_entries:
+                    if reason is None:
+                        item["unused_folders"].append((subfolder, subfolder_path, None))
                         if log_fn:
-                            log_fn(f"Skipped layer folder: {subfolder} in {folder} (used in .yy or has root PNG)", "info")
+                            log_fn("Found unused layer folder: %s in %s", "info", subfolder, folder)
+                    elif log_fn:
+                        if reason == "root":
+                            log_fn("Subfolder %s matches root PNG in %s", "debug", subfolder, folder)
+                        else:
+                            log_fn("Subfolder %s matches name in %s.yy", "debug", subfolder, folder)
+            yield item
+    finally:
+        results.close()
 
+    if cache is not None:
+        cache.save(None if all_folders is None else set(all_folders))
     if progress_callback:
         progress_callback(100)
-    return layer_data
\ No newline at end of file
+
+def find_references(project_dir, sprite_data, log_fn=None, max_workers=None, cancel_event=None):
+    """Set sprite_data[folder]["references"] to the files naming each sprite ([] if none do)."""
+    log_fn = lazy_log(log_fn)
+    with STATS.timer("find references"):
+        index = build_reference_index(project_dir, list(sprite_data), max_workers, cancel_event)
+    if index is None:
+        raise ScanCancelled("Scan cancelled.")
+    annotate_references(sprite_data, index)
+    if log_fn:
+        log_fn("Found references to %d of %d sprites.", "info", len(index), len(sprite_data))
+
+def scan_project_all(project_dir, log_fn=None, progress_callback=None, max_workers=None, use_cache=False,
+                     sprites=True, layers=True, cancel_event=None, references=False):
+    """Build both the sprite and the layer results from a single pass over the project.
+
+    Returns (sprite_data, file_sizes, used_frames_global, layer_data). Sprite results only cover
+    folders listed in the .yyp (when it lists any); layer results cover every folder on disk.
+    With references, each sprite_data entry also gets "references" (see find_references).
+    """
+    sprite_data, file_sizes, used_frames_global, layer_data = new_scan_results()
+    for item in iter_scan_project(project_dir, log_fn, progress_callback, max_workers, use_cache,
+                                  sprites, layers, cancel_event):
+        add_scan_item(item, sprite_data, file_sizes, used_frames_global, layer_data)
+    if references and sprites:
+        find_references(project_dir, sprite_data, log_fn, max_workers, cancel_event)
+    return sprite_data, file_sizes, used_frames_global, layer_data
+
+def scan_gms2_project(project_dir, log_fn=None, progress_callback=None, max_workers=None, use_cache=False, cancel_event=None):
+    sprite_data, file_sizes, used_frames_global, _ = scan_project_all(
+        project_dir, log_fn, progress_callback, max_workers, use_cache, layers=False, cancel_event=cancel_event,
+        references=True)
+    return sprite_data, file_sizes, used_frames_global
+
+def scan_layers(project_dir, log_fn=None, progress_callback=None, max_workers=None, use_cache=False, cancel_event=None):
+    layer_data = scan_project_all(project_dir, log_fn, progress_callback, max_workers, use_cache, sprites=False,
+                                  cancel_event=cancel_event)[3]
+    fill_layer_pngs(layer_data)
+    return layer_data
@@ -0,0 +1,66 @@
+from array import array
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    """Substring search over everything a scan flagged, across all folders.
+
+    Each unused frame and unused layer folder is indexed by the trigrams of "folder/name"
+    (lowercased). A query reads the shortest list among its trigrams and checks only those
+    entries; shorter queries check every entry. Removing an entry just forgets it, and the
+    lists are rebuilt once more than half of what they hold is gone, so deletes stay cheap."""
+
+    def __init__(self):
+        self.entries = {}   # id -> (key, path, folder, kind)
+        self.ids = {}       # path -> id
+        self.postings = {}  # trigram -> array of ids, removed ones included
+        self.next_id = 0
+        self.removed = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, path, folder, name, kind):
+        """Index one flagged path; kind is the view it belongs to, "sprites" or "layers"."""
+        self.remove(path)
+        key = f"{folder}/{name}".lower()
+        i = self.next_id
+        self.next_id += 1
+        self.entries[i] = (key, path, folder, kind)
+        self.ids[path] = i
+        self._post(i, key)
+
+    def _post(self, i, key):
+        for trigram in _trigrams(key):
+            ids = self.postings.get(trigram)
+            if ids is None:
+                ids = self.postings[trigram] = array("l")
+            ids.append(i)
+
+    def remove(self, path):
+        i = self.ids.pop(path, None)
+        if i is None:
+            return
+        del self.entries[i]
+        self.removed += 1
+        if self.removed > len(self.entries):
+            self.postings = {}
+            for i, (key, _, _, _) in self.entries.items():
+                self._post(i, key)
+            self.removed = 0
+
+    def search(self, term, kind=None):
+        """[(folder, path)] whose "folder/name" contains term, in any case, sorted by folder."""
+        term = term.lower()
+        if len(term) < 3:
+            candidates = list(self.entries)
+        else:
+            candidates = min((self.postings.get(t, ()) for t in _trigrams(term)), key=len)
+        hits = []
+        for i in candidates:
+            entry = self.entries.get(i)
+            if entry is not None and term in entry[0] and (kind is None or entry[3] == kind):
+                hits.append((entry[2], i, entry[1]))
+        hits.sort()
+        return [(folder, path) for folder, _, path in hits]
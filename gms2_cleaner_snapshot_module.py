@@ -0,0 +1,259 @@
+"""Scan snapshots: a scan's results in a small SQLite file that reopens without rescanning.
+
+Paths are stored relative to the project, so a snapshot still applies after the project moves.
+Scripts can query the tables directly, or use this module from the command line:
+
+    python gms2_cleaner_snapshot_module.py snapshot.db            # ghost counts as JSON
+    python gms2_cleaner_snapshot_module.py old.db new.db          # what changed between two
+
+Tables (PRAGMA user_version is SNAPSHOT_VERSION):
+    meta(key, value)                        project, created, layers, yyp_mtime
+    folders(folder, is_sprite, dir_mtime, layers_mtime, yy_mtime, used, refs)
+    pngs(folder, name, size, unused)        every root PNG; unused = 1 for ghost frames
+    layer_folders(folder, subfolder)        unused layer folders
+    layer_pngs(folder, subfolder, rel, size)
+    duplicates(grp, folder, name)           byte-identical root PNGs share grp
+"""
+import os
+import sys
+import json
+import glob
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime
+
+from gms2_cleaner_model_module import PngList
+from gms2_cleaner_scan_module import read_yyp_sprite_folders
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = os.path.expanduser("~/.gms2_cleaner_snapshots")
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE folders (folder TEXT PRIMARY KEY, is_sprite INTEGER, dir_mtime INTEGER, layers_mtime INTEGER,
+                      yy_mtime INTEGER, used TEXT, refs TEXT);
+CREATE TABLE pngs (folder TEXT, name TEXT, size INTEGER, unused INTEGER);
+CREATE TABLE layer_folders (folder TEXT, subfolder TEXT);
+CREATE TABLE layer_pngs (folder TEXT, subfolder TEXT, rel TEXT, size INTEGER);
+CREATE TABLE duplicates (grp INTEGER, folder TEXT, name TEXT);
+"""
+
+def snapshot_path(project_dir, snapshot_dir=SNAPSHOT_DIR):
+    """Where a project's snapshot goes; the path hash keeps same-named projects apart."""
+    project_dir = os.path.abspath(project_dir)
+    digest = hashlib.sha1(project_dir.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(snapshot_dir, f"{os.path.basename(project_dir)}_{digest}.db")
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def project_state(project_dir):
+    """The .yyp's mtime and {sprite folder: (folder, layers/ and .yy mtimes)}. Taken before a scan,
+    so anything that changes while it runs is scanned again when the snapshot is loaded."""
+    return _yyp_mtime(project_dir), _folder_mtimes(project_dir)
+
+def _folder_mtimes(project_dir):
+    sprites_dir = os.path.join(project_dir, "sprites")
+    mtimes = {}
+    try:
+        scan = os.scandir(sprites_dir)
+    except OSError:
+        return mtimes
+    with scan:
+        for entry in scan:
+            try:
+                if entry.is_dir():
+                    mtimes[entry.name] = (entry.stat().st_mtime_ns, _mtime(os.path.join(entry.path, "layers")),
+                                          _mtime(os.path.join(entry.path, f"{entry.name}.yy")))
+            except OSError:
+                pass
+    return mtimes
+
+def _yyp_mtime(project_dir):
+    return max((_mtime(p) or 0 for p in glob.glob(os.path.join(project_dir, "*.yyp"))), default=0)
+
+def save_snapshot(path, project_dir, state, sprite_data, file_sizes, layer_data, duplicate_index=None):
+    """Write a scan's results to path, replacing any earlier snapshot there. state is
+    project_state() from before the scan."""
+    project_dir = os.path.abspath(project_dir)
+    yyp_mtime, mtimes = state
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.execute("PRAGMA user_version = %d" % SNAPSHOT_VERSION)
+        meta = {"project": project_dir, "created": datetime.now().isoformat(timespec="seconds"),
+                "layers": "1" if layer_data else "0", "yyp_mtime": str(yyp_mtime)}
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+
+        folders = set(sprite_data) | set(layer_data)
+        rows = []
+        for folder in sorted(folders):
+            entry = sprite_data.get(folder)
+            used = layer_data[folder]["used_pngs"] if folder in layer_data else entry["used"]
+            refs = entry.get("references") if entry else None
+            dir_mtime, layers_mtime, yy_mtime = mtimes.get(folder, (None, None, None))
+            rows.append((folder, entry is not None, dir_mtime, layers_mtime, yy_mtime, json.dumps(sorted(used)),
+                         None if refs is None else json.dumps(refs)))
+        conn.executemany("INSERT INTO folders VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+        def png_rows():
+            for folder, pngs in file_sizes.folders.items():
+                unused = set(sprite_data[folder]["sprites"].rels) if folder in sprite_data else ()
+                for name, size in zip(pngs.rels, pngs.sizes):
+                    yield folder, name, size, name in unused
+        conn.executemany("INSERT INTO pngs VALUES (?, ?, ?, ?)", png_rows())
+
+        def layer_rows():
+            for folder in layer_data:
+                for subfolder, _, pngs in layer_data[folder]["unused_folders"]:
+                    yield folder, subfolder, pngs
+        layers = list(layer_rows())
+        conn.executemany("INSERT INTO layer_folders VALUES (?, ?)", [(f, s) for f, s, _ in layers])
+        conn.executemany("INSERT INTO layer_pngs VALUES (?, ?, ?, ?)",
+                         [(f, s, rel, size) for f, s, pngs in layers if pngs is not None
+                          for rel, size in zip(pngs.rels, pngs.sizes)])
+
+        if duplicate_index:
+            sprites_dir = os.path.join(project_dir, "sprites")
+            groups = {}
+            for group in duplicate_index.values():
+                groups.setdefault(id(group), group)
+            conn.executemany("INSERT INTO duplicates VALUES (?, ?, ?)", [
+                (i, *os.path.relpath(p, sprites_dir).split(os.sep, 1)) for i, group in enumerate(groups.values())
+                for p in group])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+def _connect(path):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SNAPSHOT_VERSION:
+        conn.close()
+        raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} snapshot")
+    return conn
+
+def read_meta(path):
+    conn = _connect(path)
+    try:
+        return dict(conn.execute("SELECT key, value FROM meta"))
+    finally:
+        conn.close()
+
+def load_snapshot(path, project_dir):
+    """Read a snapshot back as scan items for project_dir, checked against the folders on disk.
+
+    Returns (items, stale, references, duplicate_index). items are iter_scan_project dicts for
+    folders that haven't changed since the snapshot; stale is the set of folders to scan again
+    (changed, added, removed, or moved in or out of the .yyp's sprite list)."""
+    project_dir = os.path.abspath(project_dir)
+    sprites_dir = os.path.join(project_dir, "sprites")
+    conn = _connect(path)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        on_disk = _folder_mtimes(project_dir)
+        stored = {}
+        for folder, is_sprite, dir_mtime, layers_mtime, yy_mtime, used, refs in conn.execute("SELECT * FROM folders"):
+            stored[folder] = (bool(is_sprite), (dir_mtime, layers_mtime, yy_mtime), used, refs)
+        stale = {f for f in set(stored) | set(on_disk) if f not in stored or stored[f][1] != on_disk.get(f)}
+        if str(_yyp_mtime(project_dir)) != meta["yyp_mtime"]:
+            members = read_yyp_sprite_folders(project_dir)
+            stale.update(f for f in stored if (not members or f in members) != stored[f][0])
+
+        pngs = {}
+        for folder, name, size, unused in conn.execute("SELECT folder, name, size, unused FROM pngs ORDER BY rowid"):
+            if folder not in stale:
+                pngs.setdefault(folder, []).append((sys.intern(name), size, unused))
+        layer_folders = {}
+        for folder, subfolder in conn.execute("SELECT folder, subfolder FROM layer_folders ORDER BY rowid"):
+            if folder not in stale:
+                layer_folders.setdefault(folder, []).append(subfolder)
+        layer_pngs = {}
+        for folder, subfolder, rel, size in conn.execute("SELECT * FROM layer_pngs ORDER BY rowid"):
+            if folder not in stale:
+                layer_pngs.setdefault((folder, subfolder), ([], []))
+                layer_pngs[(folder, subfolder)][0].append(rel)
+                layer_pngs[(folder, subfolder)][1].append(size)
+        groups = {}
+        for grp, folder, name in conn.execute("SELECT grp, folder, name FROM duplicates"):
+            if folder not in stale:
+                groups.setdefault(grp, []).append(os.path.join(sprites_dir, folder, name))
+    finally:
+        conn.close()
+
+    items = []
+    references = {}
+    for folder in sorted(stored):
+        is_sprite, _, used, refs = stored[folder]
+        if refs is not None:
+            references[folder] = json.loads(refs)
+        if folder in stale:
+            continue
+        folder_path = os.path.join(sprites_dir, folder)
+        rows = pngs.get(folder, [])
+        item = {"folder": folder, "used_pngs": {sys.intern(name) for name in json.loads(used)},
+                "pngs": PngList(folder_path, [r[0] for r in rows], [r[1] for r in rows]),
+                "sprites": None, "unused_folders": None}
+        if is_sprite:
+            item["sprites"] = PngList(folder_path, [r[0] for r in rows if r[2]], [r[1] for r in rows if r[2]])
+        if meta["layers"] == "1":
+            item["unused_folders"] = []
+            for subfolder in layer_folders.get(folder, ()):
+                subfolder_path = os.path.join(folder_path, "layers", subfolder)
+                listed = layer_pngs.get((folder, subfolder))
+                item["unused_folders"].append(
+                    (subfolder, subfolder_path, None if listed is None else PngList(subfolder_path, *listed)))
+        items.append(item)
+
+    duplicate_index = {}
+    for group in groups.values():
+        if len(group) > 1:
+            group = tuple(group)
+            for p in group:
+                duplicate_index[p] = group
+    return items, stale, references, duplicate_index
+
+def ghost_counts(path):
+    """{folder: {"unused_pngs", "unused_bytes", "unused_layer_folders"}} for flagged folders."""
+    conn = _connect(path)
+    try:
+        counts = {}
+        for folder, n, size in conn.execute(
+                "SELECT folder, COUNT(*), SUM(size) FROM pngs WHERE unused GROUP BY folder"):
+            counts[folder] = {"unused_pngs": n, "unused_bytes": size, "unused_layer_folders": 0}
+        for folder, n in conn.execute("SELECT folder, COUNT(*) FROM layer_folders GROUP BY folder"):
+            counts.setdefault(folder, {"unused_pngs": 0, "unused_bytes": 0})["unused_layer_folders"] = n
+        return counts
+    finally:
+        conn.close()
+
+def diff_ghost_counts(old_path, new_path):
+    """{folder: (old counts, new counts)} for every folder whose counts differ; None if absent."""
+    old, new = ghost_counts(old_path), ghost_counts(new_path)
+    return {f: (old.get(f), new.get(f)) for f in sorted(set(old) | set(new)) if old.get(f) != new.get(f)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print a scan snapshot's ghost counts, or diff two snapshots.")
+    parser.add_argument("snapshot")
+    parser.add_argument("newer", nargs="?", help="a second snapshot to compare the first with")
+    args = parser.parse_args(argv)
+    if args.newer:
+        changes = diff_ghost_counts(args.snapshot, args.newer)
+        print(json.dumps({f: {"old": old, "new": new} for f, (old, new) in changes.items()}, indent=1))
+        return 1 if changes else 0
+    counts = ghost_counts(args.snapshot)
+    print(json.dumps({"meta": read_meta(args.snapshot), "folders": counts,
+                      "unused_pngs": sum(c["unused_pngs"] for c in counts.values()),
+                      "unused_layer_folders": sum(c["unused_layer_folders"] for c in counts.values())}, indent=1))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import os
+import time
+import cProfile
+import threading
+from contextlib import nullcontext
+
+PROFILE_FILE = os.path.expanduser("~/.gms2_cleaner_scan.prof")
+_NULL = nullcontext()
+
+class _Timer:
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+
+class Stats:
+    """Named timers and counters for the scan, delete and display paths.
+
+    Off by default: count() and timer() then return straight away, and timer() hands back one
+    shared do-nothing context, so leaving the calls in costs a function call each. Timers used
+    on the scan threads add up every thread's time, so they can exceed the wall-clock total."""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.times = {}
+        self.counts = {}
+
+    def reset(self):
+        with self.lock:
+            self.times = {}
+            self.counts = {}
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self.lock:
+                self.counts[name] = self.counts.get(name, 0) + n
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            total, calls = self.times.get(name, (0.0, 0))
+            self.times[name] = (total + seconds, calls + 1)
+
+    def timer(self, name):
+        return _Timer(self, name) if self.enabled else _NULL
+
+    def report(self):
+        """Lines for the summary and the log export; empty while disabled or before anything ran."""
+        if not self.enabled:
+            return []
+        with self.lock:
+            times = sorted(self.times.items(), key=lambda item: -item[1][0])
+            counts = sorted(self.counts.items())
+        lines = [f"{name}: {total * 1000:.1f} ms ({calls}x)" for name, (total, calls) in times]
+        lines += [f"{name}: {value}" for name, value in counts]
+        return lines
+
+STATS = Stats()
+
+def run_profiled(fn, path=PROFILE_FILE):
+    """Run fn under cProfile on the calling thread and dump the profile to path (open it with pstats
+    or snakeviz). Work fn hands to other threads isn't seen; the scan steps all take max_workers,
+    and max_workers=1 runs them on the calling thread with no pool, so pass that."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn)
+    finally:
+        profiler.dump_stats(path)
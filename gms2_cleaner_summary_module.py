@@ -7,16 +7,8 @@ def show_summary_popup(root, stats, unused_total_size, trash_path, backup_path,
     summary.geometry("500x400")
 
     text = tk.Text(summary, wrap="word")
-    text.insert("end", f"📊 Scan Summary\n\n")
-    text.insert("end", f"Total sprite folders scanned: {stats['total_folders']}\n")
-    text.insert("end", f"Clean sprite folders: {stats['clean_folders']}\n")
-    text.insert("end", f"Folders with unused files: {stats['flagged_folders']}\n")
-    text.insert("end", f"Total unused files: {stats['unused_files']}\n")
-    text.insert("end", f"Estimated space recoverable: {round(unused_total_size / 1024, 2)} KB\n\n")
-    text.insert("end", f"Backup directory: {backup_path or 'Not enabled'}\n")
-    text.insert("end", f"Trash path: {trash_path}\n")
-
-    text.config(state="disabled")
+    summary.text = text
+    _write_summary(text, stats, unused_total_size, trash_path, backup_path)
     text.pack(fill="both", expand=True, padx=10, pady=10)
 
     button_frame = tk.Frame(summary)
@@ -28,6 +20,31 @@ def show_summary_popup(root, stats, unused_total_size, trash_path, backup_path,
 
     if backup_path:
         tk.Button(button_frame, text="Clear All Backups", command=lambda: clear_backups_confirm(backup_path, on_clear_all_backups)).pack(side="right", padx=5)
+    return summary
+
+def update_summary_popup(summary, stats, unused_total_size, trash_path, backup_path):
+    """Refresh the totals of an open summary popup; returns False if it was closed."""
+    if summary is None or not summary.winfo_exists():
+        return False
+    _write_summary(summary.text, stats, unused_total_size, trash_path, backup_path)
+    return True
+
+def _write_summary(text, stats, unused_total_size, trash_path, backup_path):
+    text.config(state="normal")
+    text.delete("1.0", "end")
+    text.insert("end", f"📊 Scan Summary\n\n")
+    text.insert("end", f"Total sprite folders scanned: {stats['total_folders']}\n")
+    text.insert("end", f"Clean sprite folders: {stats['clean_folders']}\n")
+    text.insert("end", f"Folders with unused files: {stats['flagged_folders']}\n")
+    text.insert("end", f"Total unused files: {stats['unused_files']}\n")
+    text.insert("end", f"Sprites nothing references: {stats.get('unreferenced_sprites', 0)} (not deleted automatically)\n")
+    text.insert("end", f"Estimated space recoverable: {round(unused_total_size / 1024, 2)} KB\n\n")
+    text.insert("end", f"Backup directory: {backup_path or 'Not enabled'}\n")
+    text.insert("end", f"Trash path: {trash_path}\n")
+    if stats.get("timings"):
+        text.insert("end", "\nTimings and counters:\n")
+        text.insert("end", "".join(f"  {line}\n" for line in stats["timings"]))
+    text.config(state="disabled")
 
 def clear_backups_confirm(backup_path, clear_callback):
     confirm = messagebox.askyesno("Clear All Backups", f"""Delete all backups in:
@@ -0,0 +1,94 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+THUMB_SIZE = (96, 96)
+THUMB_DIR = os.path.expanduser("~/.gms2_cleaner_thumbs")
+PREFETCH_LIMIT = 200
+
+class ThumbnailCache:
+    """LRU of decoded preview images capped by byte size, with optional disk cache and prefetch."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, disk_dir=None, workers=2):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.items = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.generation = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, path):
+        """Return the thumbnail for path, decoding it now if it is not cached yet."""
+        key = self._key(path)
+        with self.lock:
+            img = self.items.get(key)
+            if img is not None:
+                self.items.move_to_end(key)
+                return img
+        img = self._load(key)
+        self._put(key, img)
+        return img
+
+    def prefetch(self, paths):
+        """Decode thumbnails for paths in the background; a newer call abandons the older one."""
+        self.generation += 1
+        generation = self.generation
+        for path in paths[:PREFETCH_LIMIT]:
+            self.executor.submit(self._prefetch_one, path, generation)
+
+    def _prefetch_one(self, path, generation):
+        if generation != self.generation:
+            return
+        try:
+            key = self._key(path)
+            with self.lock:
+                if key in self.items:
+                    return
+            self._put(key, self._load(key))
+        except Exception:
+            pass
+
+    def _key(self, path):
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(f"{key[0]}|{key[1]}|{key[2]}".encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, digest + ".png")
+
+    def _load(self, key):
+        disk_path = self._disk_path(key) if self.disk_dir else None
+        if disk_path and os.path.isfile(disk_path):
+            try:
+                with Image.open(disk_path) as img:
+                    img.load()
+                    return img.copy()
+            except Exception:
+                pass
+        with Image.open(key[0]) as img:
+            img.draft("RGBA", THUMB_SIZE)
+            img.thumbnail(THUMB_SIZE)
+            thumb = img.convert("RGBA")
+        if disk_path:
+            try:
+                thumb.save(disk_path, compress_level=1)
+            except OSError:
+                pass
+        return thumb
+
+    def _put(self, key, img):
+        size = img.width * img.height * len(img.getbands())
+        with self.lock:
+            if key in self.items:
+                return
+            self.items[key] = img
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self.items) > 1:
+                _, old = self.items.popitem(last=False)
+                self.bytes -= old.width * old.height * len(old.getbands())
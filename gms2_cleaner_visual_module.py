@@ -0,0 +1,115 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = None
+    Image = None
+
+SIGNATURE_SIZE = (8, 8)
+BATCH_SIZE = 256
+
+def visual_duplicates_available():
+    return np is not None and Image is not None
+
+def _header(path):
+    """Read dimensions without decoding pixels."""
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except Exception:
+        return None
+
+def _decode(path):
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGBA"))
+
+def _signature(path):
+    """Per-channel sums plus a tiny downsampled copy; the decoded frame is dropped right away."""
+    try:
+        with Image.open(path) as img:
+            img = img.convert("RGBA")
+            sums = tuple(np.asarray(img).sum(axis=(0, 1), dtype=np.uint64).tolist())
+            thumb = img.resize(SIGNATURE_SIZE, Image.NEAREST).tobytes()
+        return sums, thumb
+    except Exception:
+        return None
+
+def _map_batched(map_fn, fn, items):
+    results = []
+    for start in range(0, len(items), BATCH_SIZE):
+        results.extend(map_fn(fn, items[start:start + BATCH_SIZE]))
+    return results
+
+def _split_identical(group):
+    """Compare each frame of a candidate group against one decoded representative at a time."""
+    groups = []
+    remaining = list(group)
+    while len(remaining) > 1:
+        base_path = remaining[0]
+        try:
+            base = _decode(base_path)
+        except Exception:
+            remaining.pop(0)
+            continue
+        same, rest = [base_path], []
+        for path in remaining[1:]:
+            try:
+                if np.array_equal(base, _decode(path)):
+                    same.append(path)
+                    continue
+            except Exception:
+                pass
+            rest.append(path)
+        del base
+        if len(same) > 1:
+            groups.append(same)
+        remaining = rest
+    return groups
+
+def find_visual_duplicate_groups(paths, max_workers=None):
+    """Group PNGs that decode to identical RGBA pixels, even if the files differ byte-wise.
+
+    Frames are bucketed by dimensions (header only), then by channel sums and an 8x8
+    signature, so only frames that already agree on all of those are fully compared.
+    """
+    if not visual_duplicates_available():
+        return []
+    paths = list(paths)
+    if max_workers == 1:
+        return _find_visual_groups(paths, map)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return _find_visual_groups(paths, executor.map)
+
+def _find_visual_groups(paths, map_fn):
+    by_size = defaultdict(list)
+    for path, size in zip(paths, _map_batched(map_fn, _header, paths)):
+        if size is not None:
+            by_size[size].append(path)
+    candidates = [(size, p) for size, group in by_size.items() if len(group) > 1 for p in group]
+
+    by_signature = defaultdict(list)
+    signatures = _map_batched(map_fn, _signature, [p for _, p in candidates])
+    for (size, path), signature in zip(candidates, signatures):
+        if signature is not None:
+            by_signature[(size, signature)].append(path)
+    groups = [group for group in by_signature.values() if len(group) > 1]
+
+    results = []
+    for split in map_fn(_split_identical, groups):
+        results.extend(split)
+    return results
+
+def merge_visual_duplicates(duplicate_index, file_sizes, max_workers=None):
+    """Add pixel-identical groups from the project's PNGs to a build_duplicate_index() result."""
+    paths = [path for entries in file_sizes.values() for _, path in entries]
+    for group in find_visual_duplicate_groups(paths, max_workers):
+        merged = set(group)
+        for path in group:
+            merged.update(duplicate_index.get(path, ()))
+        merged = tuple(sorted(merged))
+        for path in merged:
+            duplicate_index[path] = merged
+    return duplicate_index
@@ -0,0 +1,238 @@
+import os
+import sys
+import glob
+import errno
+import select
+import struct
+import threading
+import ctypes
+
+from gms2_cleaner_scan_module import read_yyp_sprite_folders, lazy_log
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_ONLYDIR = 0x01000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+POLL_INTERVAL = 2.0
+DEBOUNCE = 0.5  # GameMaker writes a sprite as several files; wait for it to go quiet
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+_libc = _load_inotify()
+
+def inotify_available():
+    return _libc is not None
+
+class ProjectWatcher:
+    """Watch a project's sprites/ folder and .yyp and report which sprite folders changed.
+
+    on_change(folders) is called on the watcher thread with the set of sprite folder names to
+    scan again (including ones that were removed). Uses inotify on Linux and otherwise, or when
+    the watch limit is reached, polls directory mtimes: adding, removing or renaming a frame
+    always touches its folder, so file contents are never read while nothing changes."""
+
+    def __init__(self, project_dir, on_change, poll_interval=POLL_INTERVAL, debounce=DEBOUNCE, log_fn=None):
+        self.project_dir = project_dir
+        self.sprites_dir = os.path.join(project_dir, "sprites")
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.log_fn = lazy_log(log_fn)
+        self.stop_event = threading.Event()
+        self.members = read_yyp_sprite_folders(project_dir)
+        self.backend = "inotify" if inotify_available() else "polling"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _log(self, message, level="info", *args):
+        if self.log_fn:
+            self.log_fn(message, level, *args)
+
+    def _run(self):
+        if self.backend == "inotify":
+            try:
+                self._run_inotify()
+                return
+            except OSError as e:
+                self.backend = "polling"
+                self._log("⚠ inotify unavailable (%s); polling for changes instead.", "warn", e)
+        self._run_polling()
+
+    def _yyp_changed(self, folders):
+        """Re-read the .yyp; folders that joined or left its sprite list change how they're scanned."""
+        members = read_yyp_sprite_folders(self.project_dir)
+        if members == self.members:
+            return
+        if members and self.members:
+            folders.update(members ^ self.members)
+        else:
+            # Going to or from "every folder counts": anything on disk may have changed
+            folders.update(_list_dirs(self.sprites_dir))
+            folders.update(members or self.members)
+        self.members = members
+
+    def _report(self, folders):
+        if folders and not self.stop_event.is_set():
+            try:
+                self.on_change(folders)
+            except Exception as e:
+                self._log(f"⚠ Failed to update changed folders: {e}", "error")
+
+    # inotify
+
+    def _run_inotify(self):
+        fd = _libc.inotify_init1(os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.fd = fd
+        self.watches = {}  # watch descriptor -> (sprite folder or None, path)
+        try:
+            self._add_watch(self.project_dir, None)
+            if self._add_watch(self.sprites_dir, None):
+                self._watch_sprites_dir()
+            self._read_events()
+        finally:
+            os.close(fd)
+
+    def _add_watch(self, path, folder):
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "the inotify watch limit is reached (fs.inotify.max_user_watches)")
+            return False  # Gone already, or not a directory
+        self.watches[wd] = (folder, path)
+        return True
+
+    def _watch_sprites_dir(self):
+        for folder in _list_dirs(self.sprites_dir):
+            self._watch_folder(folder)
+
+    def _watch_folder(self, folder):
+        # The folder itself (frames, .yy) and its layers/ (which layer folders exist). Files
+        # inside a layer folder don't affect the scan, so those aren't watched.
+        folder_path = os.path.join(self.sprites_dir, folder)
+        if self._add_watch(folder_path, folder):
+            self._add_watch(os.path.join(folder_path, "layers"), folder)
+
+    def _read_events(self):
+        pending = set()
+        yyp = False
+        while not self.stop_event.is_set():
+            timeout = self.debounce if pending or yyp else self.poll_interval
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if not ready:
+                # Quiet for a debounce period: report what piled up
+                if yyp:
+                    self._yyp_changed(pending)
+                    yyp = False
+                self._report(pending)
+                pending = set()
+                continue
+            data = os.read(self.fd, 64 * 1024)
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                yyp = self._handle_event(wd, mask, os.fsdecode(name), pending) or yyp
+
+    def _handle_event(self, wd, mask, name, pending):
+        """Record one event in pending; returns True if it was the .yyp."""
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return False
+        watch = self.watches.get(wd)
+        if watch is None:
+            return False
+        folder, path = watch
+        created = mask & (IN_CREATE | IN_MOVED_TO) and mask & IN_ISDIR
+        if folder is not None:
+            pending.add(folder)
+            if created and name == "layers" and path == os.path.join(self.sprites_dir, folder):
+                self._add_watch(os.path.join(path, name), folder)
+        elif path == self.sprites_dir:
+            if mask & IN_ISDIR and name:
+                pending.add(name)
+                if created:
+                    self._watch_folder(name)
+        elif name.lower().endswith(".yyp"):
+            return True
+        elif name == "sprites" and created and self._add_watch(self.sprites_dir, None):
+            self._watch_sprites_dir()
+            pending.update(_list_dirs(self.sprites_dir))
+        return False
+
+    # Polling
+
+    def _run_polling(self):
+        snapshot = self._snapshot()
+        while not self.stop_event.wait(self.poll_interval):
+            current = self._snapshot()
+            if current == snapshot:
+                continue
+            # Let a save in progress finish before scanning the folders it touched
+            while not self.stop_event.wait(self.debounce):
+                settled = self._snapshot()
+                if settled == current:
+                    break
+                current = settled
+            folders = {f for f in set(current) | set(snapshot)
+                       if f is not None and current.get(f) != snapshot.get(f)}
+            if current.get(None) != snapshot.get(None):
+                self._yyp_changed(folders)
+            snapshot = current
+            self._report(folders)
+
+    def _snapshot(self):
+        """{sprite folder: (folder mtime, layers/ mtime), None: .yyp mtimes}, all from stat calls."""
+        snapshot = {None: tuple(sorted(_mtime(p) for p in glob.glob(os.path.join(self.project_dir, "*.yyp"))))}
+        try:
+            scan = os.scandir(self.sprites_dir)
+        except OSError:
+            return snapshot
+        with scan:
+            for entry in scan:
+                try:
+                    if entry.is_dir():
+                        snapshot[entry.name] = (entry.stat().st_mtime_ns, _mtime(os.path.join(entry.path, "layers")))
+                except OSError:
+                    pass
+        return snapshot
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _list_dirs(path):
+    try:
+        with os.scandir(path) as scan:
+            return {entry.name for entry in scan if entry.is_dir()}
+    except OSError:
+        return set()
@@ -0,0 +1,94 @@
+import sys
+import queue
+import threading
+import time
+import traceback
+
+class BackgroundRunner:
+    """Run one job at a time on a worker thread; its log, progress and result reach Tk through a queue."""
+
+    def __init__(self, root, log_fn, progress_fn, poll_ms=16, budget_ms=8, log_enabled=None):
+        self.root = root
+        self.log_fn = log_fn
+        self.log_enabled = log_enabled
+        self.progress_fn = progress_fn
+        self.poll_ms = poll_ms
+        self.budget = budget_ms / 1000
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self.pending = False
+        self.root.after(self.poll_ms, self._poll)
+
+    def busy(self):
+        """True until the job's completion callback has run on the Tk thread."""
+        return self.pending
+
+    def start(self, task, on_done=None, on_error=None):
+        if self.busy():
+            return False
+        self.cancel_event.clear()
+        self.pending = True
+
+        def run():
+            try:
+                result = task()
+            except Exception as e:
+                self.queue.put(("done", on_error, (e,)))
+            else:
+                self.queue.put(("done", on_done, (result,)))
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        return True
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    # Safe to call from the worker thread.
+    def log(self, message, level="info", *args):
+        # Drop filtered lines here so their args are never formatted
+        if self.log_enabled is not None and not self.log_enabled(level):
+            return
+        self.queue.put(("log", message, level, args))
+
+    def progress(self, value):
+        self.queue.put(("progress", value))
+
+    def post(self, fn, *args):
+        self.queue.put(("call", fn, args))
+
+    def _poll(self):
+        deadline = time.perf_counter() + self.budget
+        progress = None
+        try:
+            while time.perf_counter() < deadline:
+                item = self.queue.get_nowait()
+                if item[0] == "log":
+                    self.log_fn(item[1], item[2], *item[3])
+                elif item[0] == "progress":
+                    progress = item[1]
+                else:
+                    if progress is not None:
+                        self.progress_fn(progress)
+                        progress = None
+                    if item[0] == "done":
+                        self.pending = False
+                    if item[1] is not None:
+                        self._call(item[1], item[2])
+        except queue.Empty:
+            pass
+        finally:
+            # Polling must survive a failing callback, or later results never arrive and busy() sticks
+            try:
+                if progress is not None:
+                    self.progress_fn(progress)
+            finally:
+                self.root.after(self.poll_ms, self._poll)
+
+    def _call(self, fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            self.log_fn(f"⚠ {getattr(fn, '__name__', 'callback')} failed: {e}", "error")
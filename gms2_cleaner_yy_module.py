@@ -0,0 +1,91 @@
+import re
+import json
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    _loads = json.loads
+
+# A string (and the colon after it, if it is a key) or a bracket. Numbers, booleans, commas and
+# whitespace never produce a token, so trailing commas need no special handling.
+_TOKEN = re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"\s*(:)?|[\[\]{}]')
+_TRAILING_COMMA = re.compile(r',(\s+[\]}])')
+_SECTION_START = {}
+FRAME_NAME_KEYS = ("name", "%Name")
+RESOURCE_PATH_KEYS = ("path", "resourcePath")  # resources[*].id.path (2.3+) / resources[*].Value.resourcePath (2.2)
+
+def _unescape(s):
+    return json.loads(f'"{s}"') if "\\" in s else s
+
+def _load_section(text, key):
+    """Parse only the root object's key array. GameMaker indents root keys by two spaces, so the
+    array ends at the next line starting with "  ]". Returns None if the file isn't laid out that way."""
+    pattern = _SECTION_START.get(key)
+    if pattern is None:
+        pattern = _SECTION_START[key] = re.compile(r'\n  "%s"\s*:\s*\[' % re.escape(key))
+    m = pattern.search(text)
+    if m is None:
+        return None
+    end = text.find("\n  ]", m.end())
+    if end < 0:
+        return None
+    try:
+        # Anything but exactly the array (a wrong end, extra data) fails to parse
+        chunk = text[m.end() - 1:end + 4].replace(",}", "}").replace(",]", "]")
+        value = _loads(_TRAILING_COMMA.sub(r"\1", chunk))
+    except ValueError:
+        return None
+    return value if isinstance(value, list) else None
+
+def _collect(text, section, keys, value_depth):
+    """Yield string values of keys at value_depth inside the root object's section (the root is
+    depth 1, so frames[*].name is 3). Stops at the end of the section; whatever follows it, such
+    as a sprite's sequence, is never tokenized."""
+    depth = 0
+    start = 0  # Depth of the section's array once its key has been seen
+    key = None
+    for m in _TOKEN.finditer(text):
+        c = m.group(0)[0]
+        if c == "{" or c == "[":
+            depth += 1
+            key = None
+        elif c == "}" or c == "]":
+            depth -= 1
+            key = None
+            if start and depth < start:
+                return
+        elif m.group(2):
+            key = m.group(1)
+            if depth == 1 and key == section:
+                start = 2
+        else:
+            if start and depth == value_depth and key in keys:
+                yield _unescape(m.group(1))
+            key = None
+
+def read_frame_names(text):
+    """Return the set of frames[*].name / %Name values from a sprite .yy."""
+    frames = _load_section(text, "frames")
+    if frames is None:
+        return set(_collect(text, "frames", FRAME_NAME_KEYS, 3))
+    return {frame[k] for frame in frames if isinstance(frame, dict)
+            for k in FRAME_NAME_KEYS if isinstance(frame.get(k), str)}
+
+def read_sprite_folders(text):
+    """Return the folder names of every sprite listed in a .yyp's resources."""
+    resources = _load_section(text, "resources")
+    if resources is None:
+        paths = _collect(text, "resources", RESOURCE_PATH_KEYS, 4)
+    else:
+        paths = [ref.get(k) for entry in resources if isinstance(entry, dict)
+                 for ref in entry.values() if isinstance(ref, dict) for k in RESOURCE_PATH_KEYS]
+    folders = set()
+    for path in paths:
+        if not isinstance(path, str):
+            continue
+        parts = path.replace("\\", "/").split("/")
+        if len(parts) > 2 and parts[0] == "sprites":
+            folders.add(parts[1])
+    return folders
@@ -1,13 +1,26 @@
 from tkinter import *
 from tkinter import ttk, filedialog, messagebox
 import os
+import threading
 
-from gms2_cleaner_scan_module import scan_gms2_project, scan_layers
-from gms2_cleaner_display_module import populate_folder_list, load_folder_contents
-from gms2_cleaner_deletion_module import delete_files, undo_last_delete, cleanup_old_backups
-from gms2_cleaner_summary_module import show_summary_popup
+from gms2_cleaner_scan_module import (iter_scan_project, new_scan_results, add_scan_item, find_references, ScanCancelled,
+                                      unlisted_layer_folders, list_layer_pngs, set_layer_pngs)
+from gms2_cleaner_refs_module import unreferenced_sprites
+from gms2_cleaner_display_module import FolderList, load_folder_contents, load_search_results, folder_unused_count
+from gms2_cleaner_results_module import ResultIndex
+from gms2_cleaner_model_module import FileSizes
+from gms2_cleaner_deletion_module import delete_files, undo_last_delete, recover_sessions, cleanup_old_backups, trash_root_for
+from gms2_cleaner_duplicate_module import build_duplicate_index
+from gms2_cleaner_visual_module import visual_duplicates_available, merge_visual_duplicates
+from gms2_cleaner_summary_module import show_summary_popup, update_summary_popup
 from gms2_cleaner_log_module import LogPanel
+from gms2_cleaner_checklist_module import VirtualCheckList
+from gms2_cleaner_thumbnail_module import ThumbnailCache, THUMB_DIR
 from gms2_cleaner_theme_module import ThemeManager
+from gms2_cleaner_worker_module import BackgroundRunner
+from gms2_cleaner_watch_module import ProjectWatcher
+from gms2_cleaner_stats_module import STATS, run_profiled, PROFILE_FILE
+from gms2_cleaner_snapshot_module import snapshot_path, project_state, save_snapshot, load_snapshot, read_meta
 
 class GMS2Cleaner:
     def __init__(self, root):
@@ -17,20 +30,32 @@ class GMS2Cleaner:
         self.project_name = ""
         self.sprite_data = {}
         self.layer_data = {}
-        self.file_sizes = {}
+        self.file_sizes = FileSizes()
+        self.duplicate_index = {}
         self.used_frames = set()
-        self.file_vars = []
+        self.results_index = ResultIndex()
         self.selected_folder = None
         self.display_mode = "sprites"  # Tracks whether showing sprites or layers
+        self.scan_current = False
+        self.summary_popup = None
+        self.summary_refresh_pending = False
+        self.scan_generation = 0  # Bumped per scan so stale layer listings and watch updates are dropped
+        self.watcher = None
 
         self.backup_enabled = BooleanVar(value=True)
-        self.trash_dir = os.path.join(os.getcwd(), "_GMS2Cleaner_Trash")
+        self.visual_duplicates = BooleanVar(value=False)
+        self.trash_dir = None  # Beside the project; set when one is loaded
         self.backup_dir = os.path.expanduser("~/Documents/GMS2Cleaner_Backups")
 
         self.log_panel = LogPanel(self.root)
         self.theme_mgr = ThemeManager(self.root, self.apply_theme)
+        self.watch_enabled = BooleanVar(value=self.theme_mgr.settings.get("watch_project", False))
+        STATS.enabled = self.theme_mgr.settings.get("instrumentation", False)
+        self.thumbnails = ThumbnailCache(disk_dir=THUMB_DIR if self.theme_mgr.settings.get("thumbnail_disk_cache") else None)
 
         self.setup_ui()
+        self.runner = BackgroundRunner(self.root, self.log_panel.log, self.update_progress,
+                                       log_enabled=self.log_panel.enabled)
         self.apply_theme()
 
     def setup_ui(self):
@@ -41,7 +66,10 @@ class GMS2Cleaner:
         Button(top, text="Delete", command=self.delete_selected).pack(side=LEFT)
         Button(top, text="Clear All Sprites", command=self.clear_all_sprites).pack(side=LEFT)
         Button(top, text="Clear All Layers", command=self.clear_all_layers).pack(side=LEFT)
+        Button(top, text="Cancel", command=self.cancel_task).pack(side=LEFT)
         Checkbutton(top, text="Backup Deletes", variable=self.backup_enabled).pack(side=LEFT)
+        Checkbutton(top, text="Visual Dupes", variable=self.visual_duplicates).pack(side=LEFT)
+        Checkbutton(top, text="Watch Files", variable=self.watch_enabled, command=self.toggle_watch).pack(side=LEFT)
         Button(top, text="Theme", command=self.theme_mgr.toggle_dark_mode).pack(side=LEFT)
         Button(top, text="Font +", command=self.theme_mgr.increase_font).pack(side=LEFT)
         Button(top, text="Font -", command=self.theme_mgr.decrease_font).pack(side=LEFT)
@@ -53,15 +81,20 @@ class GMS2Cleaner:
         self.folder_listbox = Listbox(self.root, font=("Arial", self.theme_mgr.font_size), width=30)
         self.folder_listbox.pack(side=LEFT, fill=Y, padx=5)
         self.folder_listbox.bind("<<ListboxSelect>>", self.load_selected_folder)
+        self.folder_list = FolderList(self.folder_listbox)
 
         right = Frame(self.root); right.pack(side=LEFT, fill=BOTH, expand=True)
-        self.canvas = Canvas(right)
-        self.scrollbar = Scrollbar(right, orient="vertical", command=self.canvas.yview)
-        self.inner_frame = Frame(self.canvas)
-
-        self.inner_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        self.canvas.create_window((0, 0), window=self.inner_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        select_bar = Frame(right); select_bar.pack(side=TOP, fill=X)
+        Button(select_bar, text="Select All", command=lambda: self.checklist.select_all(True)).pack(side=LEFT)
+        Button(select_bar, text="Select None", command=lambda: self.checklist.select_all(False)).pack(side=LEFT)
+        # Typing searches every folder's flagged files; picking a folder narrows it to that folder
+        self.search_var = StringVar()
+        self.search_var.trace_add("write", lambda *args: self.search_changed())
+        Entry(select_bar, textvariable=self.search_var, width=30).pack(side=RIGHT)
+        Label(select_bar, text="Search:").pack(side=RIGHT)
+        self.canvas = Canvas(right, highlightthickness=0)
+        self.scrollbar = Scrollbar(right, orient="vertical")
+        self.checklist = VirtualCheckList(self.canvas, self.scrollbar, self.theme_mgr.font_size)
 
         self.canvas.pack(side=LEFT, fill=BOTH, expand=True)
         self.scrollbar.pack(side=RIGHT, fill=Y)
@@ -74,120 +107,382 @@ class GMS2Cleaner:
         colors = self.theme_mgr.theme_colors[theme]
         self.root.configure(bg=colors["bg"])
         self.folder_listbox.configure(bg=colors["bg"], fg=colors["fg"], font=("Arial", self.theme_mgr.font_size))
-        self.canvas.configure(bg=colors["bg"])
-        self.inner_frame.configure(bg=colors["bg"])
+        self.checklist.apply_theme(colors["bg"], colors["fg"], self.theme_mgr.font_size)
         self.log_panel.apply_theme(theme)
-        for widget in self.inner_frame.winfo_children():
-            widget.configure(bg=colors["bg"], fg=colors["fg"], font=("Arial", self.theme_mgr.font_size))
 
     def select_project(self):
+        # A running scan or delete still belongs to the current project
+        if not self.ensure_idle():
+            return
         path = filedialog.askopenfilename(filetypes=[("GameMaker Project", "*.yyp")])
         if path:
             self.project_path = os.path.dirname(path)
             self.project_name = os.path.splitext(os.path.basename(path))[0]
+            self.trash_dir = trash_root_for(self.project_path)
+            self.selected_folder = None
             self.log_panel.log(f"Loaded project: {self.project_name}", "success")
-            self.folder_listbox.delete(0, END)
+            restored = recover_sessions(self.trash_dir, self.log_panel.log)
+            if restored:
+                self.log_panel.log(f"Restored {restored} items from an unfinished delete.", "warn")
+            self.folder_list.clear()
             self.sprite_data = {}
             self.layer_data = {}
-            self.file_sizes = {}
+            self.file_sizes = FileSizes()
+            self.duplicate_index = {}
             self.used_frames = set()
+            self.results_index = ResultIndex()
+            self.scan_generation += 1
+            self.stop_watch()
             self.display_mode = "sprites"
+            self.scan_current = False
+            self.load_snapshot()
 
-    def scan_project(self):
-        if not self.project_path:
-            messagebox.showerror("No Project", "Select a .yyp project file first.")
+    def load_snapshot(self):
+        """Reopen the last scan of this project, scanning again only the folders changed since."""
+        path = snapshot_path(self.project_path)
+        if not self.theme_mgr.settings.get("scan_snapshots", True) or not os.path.exists(path):
             return
-        self.log_panel.log("Scanning project...", "info")
-        try:
-            self.sprite_data, self.file_sizes, self.used_frames = scan_gms2_project(
-                self.project_path, log_fn=self.log_panel.log, progress_callback=self.update_progress
-            )
-            self.display_mode = "sprites"
-            populate_folder_list(self.folder_listbox, self.sprite_data, self.layer_data)
-            self.show_summary()
-            self.log_panel.log("Project scan completed.", "success")
-        except Exception as e:
-            self.log_panel.log(f"⚠ Project scan failed: {e}", "error")
-            messagebox.showerror("Error", f"Project scan failed: {e}")
+        if not self.ensure_idle():
+            return
+        project_path = self.project_path
+        workers = self.theme_mgr.settings.get("scan_workers")
+
+        def task():
+            created = read_meta(path)["created"]
+            items, stale, references, duplicate_index = load_snapshot(path, project_path)
+            if stale:
+                items += iter_scan_project(project_path, log_fn=self.runner.log, max_workers=workers,
+                                          cancel_event=self.runner.cancel_event, folders=stale)
+            result = new_scan_results()
+            for item in items:
+                add_scan_item(item, *result)
+            for folder, refs in references.items():
+                if folder in result[0]:
+                    result[0][folder]["references"] = refs
+            if stale:
+                # A changed folder can gain or lose copies anywhere; only files sharing a size get read
+                duplicate_index = build_duplicate_index(result[1], workers)
+            return result + (duplicate_index, items, len(stale), created)
+
+        self.log_panel.log("Loading the last scan...", "info")
+        self.runner.start(task, self.snapshot_loaded, self.snapshot_failed)
+
+    def snapshot_loaded(self, result):
+        self.sprite_data, self.file_sizes, self.used_frames, self.layer_data, self.duplicate_index, items, stale, created = result
+        for item in items:
+            self.results_index.add_item(item)
+        self.scan_current = True
+        self.display_mode = "sprites"
+        self.folder_list.populate(self.sprite_data, self.layer_data, mode=self.display_mode)
+        self.folder_list.mark_unreferenced(unreferenced_sprites(self.sprite_data))
+        self.show_summary()
+        self.log_panel.log(f"Loaded the scan from {created}; {stale} changed folders scanned again.", "success")
+        self.refresh_contents()
+        self.list_layer_folders()
+        self.start_watch()
+
+    def snapshot_failed(self, e):
+        self.progress["value"] = 0
+        self.log_panel.log(f"⚠ Couldn't load the last scan ({e}); press Scan Project.", "warn")
+
+    def scan_project(self):
+        self.run_scan("sprites")
 
     def scan_layers(self):
+        self.run_scan("layers")
+
+    def run_scan(self, mode):
         if not self.project_path:
             messagebox.showerror("No Project", "Select a .yyp project file first.")
             return
-        self.log_panel.log("Scanning layers...", "info")
-        try:
-            self.layer_data = scan_layers(self.project_path, log_fn=self.log_panel.log, progress_callback=self.update_progress)
-            self.display_mode = "layers"
-            populate_folder_list(self.folder_listbox, self.sprite_data, self.layer_data)
+        # Both views come from the same scan; switching views reuses it until something is deleted.
+        if self.scan_current and mode != self.display_mode:
+            self.display_mode = mode
+            self.folder_list.populate(self.sprite_data, self.layer_data, mode=self.display_mode)
             self.show_summary()
-            self.log_panel.log("Layer scan completed.", "success")
-        except Exception as e:
-            self.log_panel.log(f"⚠ Layer scan failed: {e}", "error")
-            messagebox.showerror("Error", f"Layer scan failed: {e}")
+            self.refresh_contents()
+            self.log_panel.log(f"Showing {mode} from the last scan.", "info")
+            return
+        if not self.ensure_idle():
+            return
+        self.log_panel.log("Scanning project...", "info")
+        project_path = self.project_path
+        workers = self.theme_mgr.settings.get("scan_workers")
+        use_cache = self.theme_mgr.settings.get("scan_cache", True)
+        references = self.theme_mgr.settings.get("reference_scan", True)
+        profile = self.theme_mgr.settings.get("profile_scan", False)
+        if profile:
+            workers = 1  # See run_profiled
+        snapshot = self.theme_mgr.settings.get("scan_snapshots", True)
+        visual = self.visual_duplicates.get()
+
+        # Results stream in folder by folder; the listbox and summary fill in as they arrive.
+        self.sprite_data, self.file_sizes, self.used_frames, self.layer_data = new_scan_results()
+        self.duplicate_index = {}
+        self.results_index = ResultIndex()
+        self.scan_generation += 1
+        generation = self.scan_generation
+        self.stop_watch()
+        self.display_mode = mode
+        self.folder_list.clear()
+        STATS.reset()
+        self.show_summary()
+
+        def scan():
+            state = project_state(project_path) if snapshot else None
+            result = new_scan_results()
+            for item in iter_scan_project(project_path, log_fn=self.runner.log, progress_callback=self.runner.progress,
+                                          max_workers=workers, use_cache=use_cache, cancel_event=self.runner.cancel_event):
+                add_scan_item(item, *result)
+                self.runner.post(self.scan_item_ready, generation, item)
+            if references:
+                find_references(project_path, result[0], self.runner.log, workers, self.runner.cancel_event)
+            file_sizes = result[1]
+            with STATS.timer("find duplicates"):
+                duplicate_index = build_duplicate_index(file_sizes, workers)
+                if visual:
+                    if visual_duplicates_available():
+                        merge_visual_duplicates(duplicate_index, file_sizes, workers)
+                    else:
+                        self.runner.log("⚠ Visual duplicate check needs numpy and Pillow.", "warn")
+            if snapshot:
+                path = snapshot_path(project_path)
+                try:
+                    save_snapshot(path, project_path, state, result[0], result[1], result[3], duplicate_index)
+                    self.runner.log("Saved the scan to %s", "debug", path)
+                except Exception as e:
+                    self.runner.log(f"⚠ Couldn't save the scan for next time: {e}", "warn")
+            return result + (duplicate_index,)
+
+        def task():
+            with STATS.timer("scan total"):
+                if not profile:
+                    return scan()
+                result = run_profiled(scan)
+                self.runner.log(f"Scan profile written to {PROFILE_FILE}", "info")
+                return result
+
+        self.runner.start(task, lambda result: self.scan_finished(generation, mode, result), self.scan_failed)
+
+    def scan_item_ready(self, generation, item):
+        if generation != self.scan_generation:
+            return
+        add_scan_item(item, self.sprite_data, self.file_sizes, self.used_frames, self.layer_data)
+        self.results_index.add_item(item)
+        folder = item["folder"]
+        if (item["unused_folders"] if self.display_mode == "layers" else item["sprites"]) is not None:
+            count = folder_unused_count(folder, self.sprite_data, self.layer_data, mode=self.display_mode)
+            self.folder_list.set_row(folder, count)
+        self.schedule_summary_refresh()
+
+    def schedule_summary_refresh(self):
+        if not self.summary_refresh_pending:
+            self.summary_refresh_pending = True
+            self.root.after(250, self.refresh_live_summary)
+
+    def refresh_live_summary(self):
+        self.summary_refresh_pending = False
+        stats, total_bytes = self.summary_stats()
+        update_summary_popup(self.summary_popup, stats, total_bytes, self.trash_dir, self.backup_dir)
+
+    def scan_finished(self, generation, mode, result):
+        if generation != self.scan_generation:
+            return
+        self.sprite_data, self.file_sizes, self.used_frames, self.layer_data, self.duplicate_index = result
+        self.log_panel.log(f"Found {len(self.duplicate_index)} PNGs with identical copies.", "info")
+        self.scan_current = True
+        self.display_mode = mode
+        # The rows already streamed in with scan_item_ready; only the reference tags are new
+        if mode == "sprites":
+            self.folder_list.mark_unreferenced(unreferenced_sprites(self.sprite_data))
+        self.show_summary()
+        self.log_panel.log("Project scan completed.", "success")
+        self.refresh_contents()
+        self.list_layer_folders()
+        self.start_watch()
+
+    def list_layer_folders(self):
+        """List unused layer folders' PNGs off the Tk thread; the summary's byte total fills in as
+        they arrive. Opening a folder before then lists it on the spot."""
+        pending = unlisted_layer_folders(self.layer_data)
+        if not pending:
+            return
+        generation = self.scan_generation
+
+        def run():
+            for folder, folder_path in pending:
+                if generation != self.scan_generation:
+                    return
+                self.runner.post(self.layer_pngs_ready, generation, folder, folder_path, list_layer_pngs(folder_path))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def layer_pngs_ready(self, generation, folder, folder_path, pngs):
+        if generation == self.scan_generation and set_layer_pngs(self.layer_data, folder, folder_path, pngs):
+            self.schedule_summary_refresh()
+
+    def toggle_watch(self):
+        self.theme_mgr.settings["watch_project"] = self.watch_enabled.get()
+        self.theme_mgr.save()
+        if self.watch_enabled.get() and self.scan_generation and self.watcher is None:
+            self.start_watch()
+        elif not self.watch_enabled.get():
+            self.stop_watch()
+
+    def start_watch(self):
+        """Keep the last scan's results up to date by rescanning only the sprite folders that change."""
+        self.stop_watch()
+        if not self.watch_enabled.get() or not self.project_path:
+            return
+        project_path = self.project_path
+        generation = self.scan_generation
+
+        def changed(folders):  # On the watcher thread
+            items = list(iter_scan_project(project_path, log_fn=self.runner.log, folders=folders))
+            self.runner.post(self.folders_changed, generation, folders, items)
+
+        self.watcher = ProjectWatcher(project_path, changed, log_fn=self.runner.log)
+        self.watcher.start()
+        self.log_panel.log(f"Watching project for changes ({self.watcher.backend}).", "info")
+
+    def stop_watch(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def folders_changed(self, generation, folders, items):
+        if generation != self.scan_generation:
+            return
+        references = {}
+        for folder in folders:
+            old = self.results_index.drop_folder(folder, self.sprite_data, self.file_sizes, self.layer_data, self.duplicate_index)
+            if old is not None and "references" in old:
+                references[folder] = old["references"]
+        for item in items:
+            add_scan_item(item, self.sprite_data, self.file_sizes, self.used_frames, self.layer_data)
+            self.results_index.add_item(item)
+            if item["folder"] in references and item["folder"] in self.sprite_data:
+                self.sprite_data[item["folder"]]["references"] = references[item["folder"]]
+        shown = self.layer_data if self.display_mode == "layers" else self.sprite_data
+        for folder in folders:
+            if folder in shown:
+                self.folder_list.set_row(folder, folder_unused_count(folder, self.sprite_data, self.layer_data, mode=self.display_mode))
+            else:
+                self.folder_list.remove_row(folder)
+        self.log_panel.log(f"Updated {len(folders)} changed sprite folders.", "info")
+        if self.selected_folder in folders or self.selected_folder is None:
+            self.refresh_contents()
+        self.list_layer_folders()
+        self.schedule_summary_refresh()
+
+    def scan_failed(self, e):
+        self.progress["value"] = 0
+        if isinstance(e, ScanCancelled):
+            self.log_panel.log("Scan cancelled.", "warn")
+            return
+        self.log_panel.log(f"⚠ Project scan failed: {e}", "error")
+        messagebox.showerror("Error", f"Project scan failed: {e}")
+
+    def ensure_idle(self):
+        if self.runner.busy():
+            self.log_panel.log("⚠ Another task is still running. Wait for it or press Cancel.", "warn")
+            return False
+        return True
+
+    def cancel_task(self):
+        if self.runner.busy():
+            self.runner.cancel()
+            self.log_panel.log("Cancelling...", "warn")
+
+    def start_delete(self, file_paths, on_deleted):
+        backup = self.backup_enabled.get()
+
+        def task():
+            return delete_files(file_paths, self.trash_dir, self.project_name, backup, self.backup_dir,
+                                cancel_event=self.runner.cancel_event, progress_callback=self.runner.progress)
+
+        self.runner.start(task, on_deleted, self.task_failed)
+
+    def task_failed(self, e):
+        self.progress["value"] = 0
+        self.log_panel.log(f"⚠ Task failed: {e}", "error")
+        messagebox.showerror("Error", f"Task failed: {e}")
 
     def update_progress(self, value):
         self.progress["value"] = value
-        self.root.update()
 
     def load_selected_folder(self, event):
-        sel = self.folder_listbox.curselection()
-        if not sel:
+        name = self.folder_list.selected()
+        if name is None:
             return
-        name = self.folder_listbox.get(sel[0]).split(" (")[0]
         self.selected_folder = name
-        load_folder_contents(name, self.inner_frame, self.file_vars, self.sprite_data, self.layer_data, self.file_sizes, self.image_label, mode=self.display_mode)
+        self.refresh_contents()
 
-    def show_summary(self):
+    def search_changed(self):
+        # A new search covers all folders again
+        self.selected_folder = None
+        self.folder_listbox.selection_clear(0, END)
+        self.refresh_contents()
+
+    def refresh_contents(self):
+        """Redraw the check list: the selected folder (filtered by the search box), else the search
+        results from every folder."""
+        term = self.search_var.get().strip()
+        if self.selected_folder:
+            load_folder_contents(self.selected_folder, self.checklist, self.sprite_data, self.layer_data, self.duplicate_index, self.image_label, mode=self.display_mode, search_term=term, thumbnails=self.thumbnails)
+        elif term:
+            load_search_results(term, self.results_index.search, self.checklist, self.sprite_data, self.layer_data, self.duplicate_index, self.image_label, mode=self.display_mode, thumbnails=self.thumbnails)
+        else:
+            self.checklist.set_rows([])
+
+    def summary_stats(self):
         stats = {
             "total_folders": len(self.sprite_data),
             "clean_folders": sum(1 for f in self.sprite_data if not self.sprite_data[f]["sprites"] and (f not in self.layer_data or not self.layer_data[f]["unused_folders"])),
             "flagged_folders": sum(1 for f in self.sprite_data if self.sprite_data[f]["sprites"] or (f in self.layer_data and self.layer_data[f]["unused_folders"])),
+            "unreferenced_sprites": len(unreferenced_sprites(self.sprite_data)),
+            "timings": STATS.report(),
             "unused_files": sum(len(self.sprite_data[f]["sprites"]) + (len(self.layer_data[f]["unused_folders"]) if f in self.layer_data else 0) for f in self.sprite_data),
             "clear_all_sprites": self.clear_all_sprites,
             "clear_all_layers": self.clear_all_layers,
             "undo": self.undo_last
         }
-        total_bytes = sum(size for f in self.sprite_data for _, _, size in self.sprite_data[f]["sprites"])
-        total_bytes += sum(size for f in self.layer_data for _, _, pngs in self.layer_data[f]["unused_folders"] for _, _, size in pngs)
-        show_summary_popup(self.root, stats, total_bytes, self.trash_dir, self.backup_dir, self.clear_all_backups)
+        # Summed from the size arrays; reading PngList entries would join every path
+        total_bytes = sum(sum(self.sprite_data[f]["sprites"].sizes) for f in self.sprite_data)
+        total_bytes += sum(sum(pngs.sizes) for f in self.layer_data for _, _, pngs in self.layer_data[f]["unused_folders"] if pngs is not None)
+        return stats, total_bytes
+
+    def show_summary(self):
+        stats, total_bytes = self.summary_stats()
+        if not update_summary_popup(self.summary_popup, stats, total_bytes, self.trash_dir, self.backup_dir):
+            self.summary_popup = show_summary_popup(self.root, stats, total_bytes, self.trash_dir, self.backup_dir, self.clear_all_backups)
 
     def delete_selected(self):
-        selected = [path for var, path in self.file_vars if var.get()]
+        selected = self.checklist.checked_paths()
         if not selected:
             messagebox.showinfo("Info", "No items selected for deletion.")
             return
+        if not self.ensure_idle():
+            return
         if messagebox.askyesno("Confirm", f"Delete {len(selected)} selected items?"):
-            deleted = delete_files(selected, self.trash_dir, self.project_name, self.backup_enabled.get(), self.backup_dir)
-            self.log_panel.log(f"Deleted {len(deleted)} items.", "warn")
-            # Update data structures without rescanning
-            if self.display_mode == "sprites":
-                for path in deleted:
-                    for folder in self.sprite_data:
-                        self.sprite_data[folder]["sprites"] = [(name, p, size) for name, p, size in self.sprite_data[folder]["sprites"] if p != path]
-            else:  # layers
-                for path in deleted:
-                    for folder in self.layer_data:
-                        for i, (subfolder, folder_path, pngs) in enumerate(self.layer_data[folder]["unused_folders"]):
-                            if path == folder_path:
-                                self.layer_data[folder]["unused_folders"].pop(i)
-                            else:
-                                self.layer_data[folder]["unused_folders"][i] = (subfolder, folder_path, [(name, p, size) for name, p, size in pngs if p != path])
-                        # Remove empty folders
-                        self.layer_data[folder]["unused_folders"] = [(subfolder, folder_path, pngs) for subfolder, folder_path, pngs in self.layer_data[folder]["unused_folders"] if pngs or os.path.exists(folder_path)]
-            # Advance listbox selection
-            current_sel = self.folder_listbox.curselection()
-            if current_sel:
-                current_index = current_sel[0]
-                next_index = min(current_index + 1, self.folder_listbox.size() - 1)
-                self.folder_listbox.selection_clear(0, END)
-                self.folder_listbox.selection_set(next_index)
-                self.folder_listbox.see(next_index)
-                next_folder = self.folder_listbox.get(next_index).split(" (")[0]
-                self.selected_folder = next_folder
-            # Refresh GUI
-            if self.selected_folder:
-                load_folder_contents(self.selected_folder, self.inner_frame, self.file_vars, self.sprite_data, self.layer_data, self.file_sizes, self.image_label, mode=self.display_mode)
-            populate_folder_list(self.folder_listbox, self.sprite_data, self.layer_data)
+            self.start_delete(selected, self.selected_deleted)
+
+    def selected_deleted(self, deleted):
+        self.scan_current = False
+        self.log_panel.log(f"Deleted {len(deleted)} items.", "warn")
+        self.forget_deleted(deleted)
+        # Advance to the next folder
+        current = self.folder_list.selected()
+        if current is not None:
+            i = self.folder_list.index(current)
+            self.selected_folder = self.folder_list.folder_at(min(i + 1, len(self.folder_list.folders) - 1))
+            self.folder_list.select(self.selected_folder)
+        self.refresh_contents()
+
+    def forget_deleted(self, deleted):
+        # Only what was actually moved; a cancelled run returns a partial list
+        changed = self.results_index.remove_paths(deleted, self.sprite_data, self.layer_data, self.duplicate_index)
+        self.folder_list.refresh(changed, self.sprite_data, self.layer_data, mode=self.display_mode)
 
     def clear_all_sprites(self):
         file_paths = [path for f in self.sprite_data for _, path, _ in self.sprite_data[f]["sprites"]]
@@ -195,16 +490,17 @@ class GMS2Cleaner:
             self.log_panel.log("No unused sprite files to delete.", "info")
             messagebox.showinfo("Info", "No unused sprite files to delete.")
             return
+        if not self.ensure_idle():
+            return
         if messagebox.askyesno("Confirm Delete All Sprites", f"This will delete {len(file_paths)} unused sprite files.\nBack up your files first!\nContinue?"):
-            deleted = delete_files(file_paths, self.trash_dir, self.project_name, self.backup_enabled.get(), self.backup_dir)
-            self.log_panel.log(f"Deleted {len(deleted)} unused sprite files.", "warn")
-            # Update sprite_data
-            for f in self.sprite_data:
-                self.sprite_data[f]["sprites"] = []
-            # Refresh GUI
-            if self.selected_folder:
-                load_folder_contents(self.selected_folder, self.inner_frame, self.file_vars, self.sprite_data, self.layer_data, self.file_sizes, self.image_label, mode=self.display_mode)
-            populate_folder_list(self.folder_listbox, self.sprite_data, self.layer_data)
+            self.start_delete(file_paths, self.sprites_cleared)
+
+    def sprites_cleared(self, deleted):
+        self.scan_current = False
+        self.log_panel.log(f"Deleted {len(deleted)} unused sprite files.", "warn")
+        self.forget_deleted(deleted)
+        # Refresh GUI
+        self.refresh_contents()
 
     def clear_all_layers(self):
         file_paths = [folder_path for f in self.layer_data for _, folder_path, _ in self.layer_data[f]["unused_folders"]]
@@ -212,26 +508,29 @@ class GMS2Cleaner:
             self.log_panel.log("No unused layer folders to delete.", "info")
             messagebox.showinfo("Info", "No unused layer folders to delete.")
             return
+        if not self.ensure_idle():
+            return
         if messagebox.askyesno("Confirm Delete All Layers", f"This will delete {len(file_paths)} unused layer folders.\nBack up your files first!\nContinue?"):
-            deleted = delete_files(file_paths, self.trash_dir, self.project_name, self.backup_enabled.get(), self.backup_dir)
-            self.log_panel.log(f"Deleted {len(deleted)} unused layer folders.", "warn")
-            # Update layer_data
-            for f in self.layer_data:
-                self.layer_data[f]["unused_folders"] = []
-            # Refresh GUI
-            if self.selected_folder:
-                load_folder_contents(self.selected_folder, self.inner_frame, self.file_vars, self.sprite_data, self.layer_data, self.file_sizes, self.image_label, mode=self.display_mode)
-            populate_folder_list(self.folder_listbox, self.sprite_data, self.layer_data)
+            self.start_delete(file_paths, self.layers_cleared)
+
+    def layers_cleared(self, deleted):
+        self.scan_current = False
+        self.log_panel.log(f"Deleted {len(deleted)} unused layer folders.", "warn")
+        self.forget_deleted(deleted)
+        # Refresh GUI
+        self.refresh_contents()
 
     def undo_last(self):
-        restored = undo_last_delete(self.trash_dir)
+        if not self.trash_dir or not self.ensure_idle():
+            return
+        self.runner.start(lambda: undo_last_delete(self.trash_dir), self.undo_finished, self.task_failed)
+
+    def undo_finished(self, restored):
         if restored:
-            self.log_panel.log("Undo successful. Last delete restored.", "success")
+            self.log_panel.log(f"Undo successful. Restored {restored} items.", "success")
             # Rescan to restore data
-            if self.display_mode == "sprites":
-                self.scan_project()
-            else:
-                self.scan_layers()
+            self.scan_current = False
+            self.run_scan(self.display_mode)
         else:
             self.log_panel.log("No deletions found to undo.", "warn")
 
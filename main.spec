@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['gms2_cleaner_scan_module', 'gms2_cleaner_deletion_module', 'gms2_cleaner_display_module', 'gms2_cleaner_log_module', 'gms2_cleaner_theme_module', 'gms2_cleaner_summary_module', 'PIL'],
+    hiddenimports=['gms2_cleaner_scan_module', 'gms2_cleaner_deletion_module', 'gms2_cleaner_display_module', 'gms2_cleaner_log_module', 'gms2_cleaner_theme_module', 'gms2_cleaner_summary_module', 'gms2_cleaner_cache_module', 'gms2_cleaner_duplicate_module', 'gms2_cleaner_visual_module', 'gms2_cleaner_worker_module', 'gms2_cleaner_checklist_module', 'gms2_cleaner_thumbnail_module', 'gms2_cleaner_batch_module', 'gms2_cleaner_backup_module', 'gms2_cleaner_results_module', 'gms2_cleaner_yy_module', 'gms2_cleaner_refs_module', 'gms2_cleaner_watch_module', 'gms2_cleaner_stats_module', 'gms2_cleaner_model_module', 'gms2_cleaner_snapshot_module', 'gms2_cleaner_search_module', 'gms2_cleaner_lock_module', 'PIL'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],